@@ -0,0 +1,175 @@
+"""
+Per-hex, per-hour anomaly detection over the trip history.
+
+The job compares the actual trips of every hex and hour (Y_hex) with what
+xgb_model predicts for that hour's features (X_hex), giving an hours x
+hexes residual matrix. Each residual is scored against the hex's own
+recent history with a robust z-score:
+
+    z = (r - median) / max(1.4826 * MAD, MIN_SCALE)
+
+where median and MAD are rolling over the previous WINDOW_HOURS hours of
+that hex (MAD as the rolling median of each hour's absolute deviation
+from its median). All hexes are scored at once with column-wise rolling
+windows. Hours with |z| >= Z_THRESHOLD go into a compact anomaly index
+(ts, hex_id, actual, expected, z) under ESCOOTER_ANOMALY_DIR (default
+data/anomalies), which the Monthly Hex Map overlays.
+
+Runs are incremental: the state file keeps the last residuals the rolling
+windows need, so a rerun predicts and scores only hours added since.
+
+    python anomalies.py          # score new hours
+    python anomalies.py --full   # rescore the whole history
+"""
+import os
+import sys
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import datasets
+
+ANOMALY_DIR = os.environ.get("ESCOOTER_ANOMALY_DIR", "data/anomalies")
+INDEX_FILE = os.path.join(ANOMALY_DIR, "index.parquet")
+STATE_FILE = os.path.join(ANOMALY_DIR, "state.npz")
+
+WINDOW_HOURS = 28 * 24
+MIN_HOURS = 7 * 24
+Z_THRESHOLD = 4.0
+MAD_SCALE = 1.4826
+MIN_SCALE = 1.0  # trips; keeps near-constant hexes from flagging every small change
+
+
+# --- Scoring ---
+def residual_matrix(X, Y, model):
+    """Actual minus predicted trips: DataFrame of hours (X's index) x hex IDs (Y's columns)."""
+    preds = np.asarray(model.predict(X)).reshape(len(X), -1)
+    return pd.DataFrame(Y.to_numpy(dtype=float) - preds, index=X.index, columns=Y.columns)
+
+
+def robust_z(residuals, history=None):
+    """
+    Robust z-scores of `residuals`, each against the previous WINDOW_HOURS
+    of its column; `history` holds the residuals that came before them.
+    NaN where a hex has fewer than MIN_HOURS of history.
+    """
+    full = residuals if history is None else pd.concat([history, residuals])
+    median = full.shift(1).rolling(WINDOW_HOURS, min_periods=MIN_HOURS).median()
+    deviation = full - median
+    mad = deviation.abs().shift(1).rolling(WINDOW_HOURS, min_periods=MIN_HOURS).median()
+    z = deviation / np.maximum(MAD_SCALE * mad, MIN_SCALE)
+    return z.iloc[len(full) - len(residuals):]
+
+
+def find_anomalies(residuals, z, actual):
+    """Long frame of the cells with |z| >= Z_THRESHOLD: ts, hex_id, actual, expected, z."""
+    rows, cols = np.nonzero(np.abs(z.to_numpy()) >= Z_THRESHOLD)
+    r = residuals.to_numpy()[rows, cols]
+    y = actual[rows, cols]
+    return pd.DataFrame({
+        "ts": residuals.index[rows],
+        "hex_id": residuals.columns.to_numpy(np.uint64)[cols],
+        "actual": y.astype(np.float32),
+        "expected": (y - r).astype(np.float32),
+        "z": z.to_numpy()[rows, cols].astype(np.float32),
+    })
+
+
+# --- State and Index Files ---
+def _read_state():
+    if not os.path.exists(STATE_FILE):
+        return None
+    with np.load(STATE_FILE) as state:
+        return pd.DataFrame(state["residuals"], index=pd.DatetimeIndex(state["ts"]), columns=state["hex_ids"])
+
+
+def _write(path, write):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _save(anomalies, tail, since=None):
+    """Write the index (keeping entries before `since`, if given) and the residual tail."""
+    os.makedirs(ANOMALY_DIR, exist_ok=True)
+    if since is not None and os.path.exists(INDEX_FILE):
+        previous = pd.read_parquet(INDEX_FILE)
+        anomalies = pd.concat([previous[previous["ts"] < since], anomalies])
+    anomalies = anomalies.sort_values(["ts", "hex_id"]).reset_index(drop=True)
+    _write(INDEX_FILE, lambda tmp: anomalies.to_parquet(tmp, index=False))
+
+    def write_state(tmp):
+        with open(tmp, "wb") as f:
+            np.savez(
+                f, residuals=tail.to_numpy(np.float64), ts=tail.index.to_numpy("datetime64[ns]"),
+                hex_ids=tail.columns.to_numpy(np.uint64),
+            )
+    _write(STATE_FILE, write_state)
+
+
+# --- Job ---
+def run(full=False):
+    """Score the hours not seen yet (all of them with `full`); returns a summary dict."""
+    X, Y = datasets.load_hex_training()
+    X = X[datasets.model_metadata("xgb_model")["features"]]
+    X.index = pd.to_datetime(X.index)
+
+    history = None if full else _read_state()
+    hex_ids = Y.columns.to_numpy(np.uint64)
+    if history is not None and not np.array_equal(history.columns.to_numpy(np.uint64), hex_ids):
+        history = None  # the target hexes changed; start over
+    new = np.ones(len(X), dtype=bool) if history is None else (X.index > history.index[-1])
+    if not new.any():
+        return {"hours": 0, "anomalies": 0, "full": history is None}
+
+    residuals = residual_matrix(X[new], Y[new], datasets.load_model("xgb_model"))
+    z = robust_z(residuals, history)
+    anomalies = find_anomalies(residuals, z, Y[new].to_numpy(dtype=float))
+
+    combined = residuals if history is None else pd.concat([history, residuals])
+    _save(anomalies, combined.iloc[-2 * WINDOW_HOURS:], since=None if history is None else residuals.index[0])
+    return {"hours": int(new.sum()), "anomalies": len(anomalies), "full": history is None}
+
+
+# --- Reading the Index ---
+def _index_version():
+    return os.path.getmtime(INDEX_FILE) if os.path.exists(INDEX_FILE) else None
+
+
+@lru_cache(maxsize=2)
+def _read_index(version):
+    if version is None:
+        return pd.DataFrame({
+            "ts": pd.Series(dtype="datetime64[ns]"), "hex_id": pd.Series(dtype=np.uint64),
+            "actual": pd.Series(dtype=np.float32), "expected": pd.Series(dtype=np.float32),
+            "z": pd.Series(dtype=np.float32),
+        })
+    return pd.read_parquet(INDEX_FILE)
+
+
+@lru_cache(maxsize=2)
+def _monthly_counts(version):
+    index = _read_index(version)
+    grouped = index.assign(year_month=index["ts"].dt.to_period("M").dt.to_timestamp(), abs_z=index["z"].abs())
+    return (
+        grouped.groupby(["year_month", "hex_id"])
+        .agg(anomalies=("z", "size"), max_z=("abs_z", "max"))
+        .reset_index()
+    )
+
+
+def load_index():
+    """The anomaly index (ts, hex_id, actual, expected, z); empty until the job has run."""
+    return _read_index(_index_version())
+
+
+def monthly_counts():
+    """Anomalous hours per month and hex: DataFrame of year_month, hex_id, anomalies, max_z."""
+    return _monthly_counts(_index_version())
+
+
+if __name__ == "__main__":
+    summary = run(full="--full" in sys.argv[1:])
+    mode = "full history" if summary["full"] else "new hours"
+    print(f"Scored {summary['hours']} {mode}: {summary['anomalies']} anomalies -> {INDEX_FILE}")
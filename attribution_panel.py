@@ -0,0 +1,61 @@
+"""
+Streamlit display of the per-hex feature attributions of the hex scenarios
+(contrib_<feature> columns joined onto the predictions, see
+scenarios.contribution_frame), shared by the scenario decks.
+"""
+import pandas as pd
+import streamlit as st
+
+import explanations
+import h3_index
+import scenarios
+
+PANEL_FEATURES = 8
+POLL_SECONDS = 0.5
+
+
+def contribution_features(df):
+    """Feature names of the contrib_ columns in `df`, bias excluded."""
+    prefix = scenarios.CONTRIB_PREFIX
+    return [col[len(prefix):] for col in df.columns if col.startswith(prefix) and col != prefix + explanations.BIAS]
+
+
+def top_drivers(df):
+    """Tooltip text of each row's largest contributions."""
+    features = contribution_features(df)
+    return explanations.top_features(df[scenarios.contribution_columns(features)].to_numpy(), features)
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def await_contributions(future):
+    """
+    Stand-in for the panel while `future` (see scenarios.submit_contributions)
+    runs: polls it without blocking the page, and reruns the page once the
+    attributions are in.
+    """
+    if not future.done():
+        st.caption("Computing feature attributions...")
+    elif scenarios.contributions_ready(future):
+        st.rerun()
+    else:
+        error = "cancelled" if future.cancelled() else future.exception()
+        st.warning(f"Could not compute the feature attributions ({error}).")
+
+
+def show_attributions(preds, value_name, key, rank_by_abs=False):
+    """Pick a hex (largest predictions first) and chart the features behind its prediction."""
+    ranked = preds[value_name].abs() if rank_by_abs else preds[value_name]
+    order = ranked.sort_values(ascending=False).index
+    labels = h3_index.decode(preds.loc[order, "hex_id"])
+    choice = st.selectbox(
+        "Hex", range(len(order)), key=f"{key}_explain_hex",
+        format_func=lambda i: f"{labels[i]} ({preds.at[order[i], value_name]:.1f})"
+    )
+    row = preds.loc[order[choice]]
+
+    features = contribution_features(preds)
+    contribs = pd.Series({feature: row[scenarios.CONTRIB_PREFIX + feature] for feature in features})
+    top = contribs.loc[contribs.abs().sort_values(ascending=False).index[:PANEL_FEATURES]]
+    st.bar_chart(top.rename("contribution"), horizontal=True)
+    bias = row[scenarios.CONTRIB_PREFIX + explanations.BIAS]
+    st.caption(f"Base value {bias:.1f} + feature contributions {contribs.sum():+.1f} = {row[value_name]:.1f}")
@@ -0,0 +1,141 @@
+"""
+Process-wide, read-only dataset cache shared by every Streamlit session.
+
+st.cache_data pickles and copies its return value on every hit, so each
+rerun of each session holds its own copy of the same DataFrames. This cache
+keeps one resident copy per dataset instead, under a configurable memory
+budget (ESCOOTER_CACHE_MB, default 1024) with least-recently-used eviction.
+
+Pages receive shallow views. The app switches on pandas copy-on-write (in
+streamlit_app.py), so a page that modifies its view gets a private copy of
+just the touched columns and never corrupts the shared original.
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BUDGET_MB = 1024
+
+
+# --- Sizing & Views ---
+def nbytes(value):
+    """Approximate resident size of a cached value in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)):
+        return sum(nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(nbytes(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+def read_only_view(value):
+    """Shallow view of a cached value; no data is copied."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    if isinstance(value, np.ndarray):
+        view = value.view()
+        view.flags.writeable = False
+        return view
+    if isinstance(value, tuple):
+        return tuple(read_only_view(v) for v in value)
+    if isinstance(value, list):
+        return [read_only_view(v) for v in value]
+    if isinstance(value, dict):
+        return {k: read_only_view(v) for k, v in value.items()}
+    return value
+
+
+# --- Cache ---
+class DatasetCache:
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, loader):
+        """Return a read-only view of `key`, calling `loader()` on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return read_only_view(self._entries[key][0])
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # One loader per key; other sessions asking for it wait here.
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return read_only_view(self._entries[key][0])
+
+            value = loader()
+            size = nbytes(value)
+
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = (value, size)
+                self.resident_bytes += size
+                self._evict(keep=key)
+                self._key_locks.pop(key, None)
+        return read_only_view(value)
+
+    def _evict(self, keep):
+        # The newest entry always stays, even if it alone exceeds the budget.
+        while self.resident_bytes > self.budget_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            if key == keep:
+                self._entries.move_to_end(key)
+                continue
+            _, size = self._entries.pop(key)
+            self.resident_bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.resident_bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "resident_mb": self.resident_bytes / 2**20,
+                "budget_mb": self.budget_bytes / 2**20,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "sizes_mb": {k: size / 2**20 for k, (_, size) in self._entries.items()},
+            }
+
+
+_budget_mb = float(os.environ.get("ESCOOTER_CACHE_MB", DEFAULT_BUDGET_MB))
+cache = DatasetCache(int(_budget_mb * 2**20))
+
+
+def cached(key):
+    """Decorator: memoize a zero-argument loader in the shared cache."""
+    def decorator(loader):
+        def wrapper():
+            return cache.get(key, loader)
+        wrapper.__name__ = loader.__name__
+        wrapper.__doc__ = loader.__doc__
+        return wrapper
+    return decorator
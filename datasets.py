@@ -0,0 +1,145 @@
+"""
+Dataset and model loaders shared by the dashboard pages.
+
+Each dataset loader reads its CSV once per process and serves read-only
+views from the shared dataset cache (see dataset_cache.py). Pages should
+treat the returned frames as inputs and derive new frames rather than
+mutate them. Models are loaded once per process and shared as-is.
+
+Hex IDs (hex_id and the Y_hex / Y_demand target columns) are encoded to
+uint64 at load time; see h3_index.encode. Filtered queries over the trip
+history (and the OD flows) go through trip_store instead.
+
+Models load from their bundle in models/<name>/ when one exists (see
+model_bundle.py), which also carries the feature list, target hex IDs and
+feature defaults; otherwise from the pickle, with that metadata derived
+from the training data.
+"""
+import pickle
+from functools import lru_cache
+
+import joblib
+import pandas as pd
+
+import h3_index
+import model_bundle
+from dataset_cache import cached
+
+
+# --- Historical Data ---
+@cached("hex_toolpin")
+def load_hex_toolpin():
+    df = pd.read_csv("data/hex_toolpin.csv")
+    df["year_month"] = pd.to_datetime(df["year_month"].astype(str).str.strip(), format="%Y-%m")
+    df["hex_id"] = h3_index.encode(df["hex_id"])
+    return df
+
+
+@cached("X_forecasting")
+def load_forecasting():
+    df = pd.read_csv("data/X_forecasting.csv", parse_dates=["ds"])
+    df.set_index("ds", inplace=True)
+    return df
+
+
+# --- Model Training Data ---
+@cached("hex_training")
+def load_hex_training():
+    """(X_hex, Y_hex) behind the Consumer Demand Deck."""
+    X_hex = pd.read_csv("data/X_hex.csv", index_col=0, parse_dates=True)
+    Y_hex = pd.read_csv("data/Y_hex.csv")
+    Y_hex.columns = h3_index.encode(Y_hex.columns)
+    return X_hex, Y_hex
+
+
+@cached("demand_training")
+def load_demand_training():
+    """(X_demand, Y_demand) behind the Operational Demand Deck."""
+    X_demand = pd.read_csv("data/X_demand.csv", index_col=0, parse_dates=True)
+    Y_demand = pd.read_csv("data/Y_demand.csv")
+    Y_demand.columns = h3_index.encode(Y_demand.columns)
+    return X_demand, Y_demand
+
+
+TEMPORAL_SOURCES = ["data/data.csv", "data/train_pred_df.csv"]
+
+
+def read_temporal_frame():
+    """
+    data.csv with the rolling Prophet baseline, read fresh (uncached): past
+    hours carry actuals in y, stored future hours have y = NaN.
+    """
+    X_forecasting = pd.read_csv("data/data.csv")
+    train_pred_df = pd.read_csv("data/train_pred_df.csv", usecols=["yhat"])
+
+    X_forecasting['baseline'] = train_pred_df['yhat'].rolling(window=74).mean()
+    X_forecasting.dropna(subset=['baseline'], inplace=True)
+    X_forecasting.set_index('ds', inplace=True)
+    return X_forecasting
+
+
+@cached("temporal_training")
+def load_temporal_training():
+    """(X_train, y_train) behind the Temporal Scenario Deck."""
+    X_forecasting = read_temporal_frame()
+    X_train = X_forecasting[X_forecasting['y'].notna()].copy()
+    y_train = X_train.pop('y')
+    return X_train, y_train
+
+
+# --- Models ---
+MODELS_DIR = "models"
+
+MODEL_FILES = {
+    "xgb_model": "models/xgb_model.pkl",
+    "demand_model": "models/demand_model.pkl",
+    "boost_model": "models/boost_model.pkl",
+}
+
+# Training CSVs whose headers a bundle is checked against
+MODEL_DATA_FILES = {
+    "xgb_model": ["data/X_hex.csv", "data/Y_hex.csv"],
+    "demand_model": ["data/X_demand.csv", "data/Y_demand.csv"],
+    "boost_model": ["data/data.csv"],
+}
+
+
+def load_pickled_model(name):
+    path = MODEL_FILES[name]
+    if name == "boost_model":
+        return joblib.load(path)
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def model_training_schema(name):
+    """(X, target hex IDs) a model was trained on; reads the training data."""
+    if name == "xgb_model":
+        X, Y = load_hex_training()
+        return X, Y.columns.to_numpy()
+    if name == "demand_model":
+        X, Y = load_demand_training()
+        return X, Y.columns.to_numpy()
+    X, _ = load_temporal_training()
+    return X, []
+
+
+@lru_cache(maxsize=None)
+def _bundle(name):
+    return model_bundle.load(MODELS_DIR, name)
+
+
+@lru_cache(maxsize=None)
+def load_model(name):
+    if model_bundle.exists(MODELS_DIR, name):
+        return _bundle(name)[0]
+    return load_pickled_model(name)
+
+
+@lru_cache(maxsize=None)
+def model_metadata(name):
+    """Bundle metadata of a model: features, dtypes, targets, profile (see model_bundle)."""
+    if model_bundle.exists(MODELS_DIR, name):
+        return _bundle(name)[1]
+    X, targets = model_training_schema(name)
+    return model_bundle.describe(name, load_model(name), X, targets, MODEL_DATA_FILES[name])
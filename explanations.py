@@ -0,0 +1,42 @@
+"""
+Per-hex feature attributions for the hex scenario decks.
+
+The hex models are XGBoost regressors with one output per target hex.
+Their tree SHAP path (Booster.predict with pred_contribs=True) returns, for
+each scenario row, the contribution of every feature to every hex, plus a
+bias column; a hex's contributions and bias add up to its prediction. One
+call for the scenario row therefore explains all hexes at once, but tree
+SHAP visits every tree path per feature and is more than an order of
+magnitude slower than the predict itself.
+
+Calls are batched by prediction_service on a queue of their own. The decks
+request them only once the scenario's predictions are back and draw the
+map first, and scenarios caches them per scenario row.
+"""
+import numpy as np
+import xgboost as xgb
+
+TOP_FEATURES = 3
+BIAS = "bias"
+
+
+def contributions(model, X):
+    """rows x targets x (features + 1) tree SHAP values; the last column is the bias."""
+    boosters = [model] if hasattr(model, "get_booster") else list(model.estimators_)
+    parts = []
+    for estimator in boosters:
+        contribs = estimator.get_booster().predict(xgb.DMatrix(X), pred_contribs=True)
+        parts.append(contribs if contribs.ndim == 3 else contribs[:, None, :])
+    return np.concatenate(parts, axis=1)
+
+
+def top_features(contribs, features, k=TOP_FEATURES):
+    """Per target, its `k` largest contributions by magnitude as "feature +1.2" text."""
+    contribs = np.asarray(contribs)[:, :len(features)]
+    names = np.asarray(features, dtype=object)
+    order = np.argsort(-np.abs(contribs), axis=1)[:, :k]
+    values = np.take_along_axis(contribs, order, axis=1)
+    return [
+        ", ".join(f"{name} {value:+.2g}" for name, value in zip(names[row_order], row_values))
+        for row_order, row_values in zip(order, values)
+    ]
@@ -0,0 +1,150 @@
+"""
+Rolling multi-day forecast for the Temporal deck's Forward Forecast tab.
+
+The forecast starts after the last hour with actuals in data.csv and runs
+MAX_HORIZON_DAYS ahead, hourly. Feature rows come from:
+
+- the stored Prophet baseline (the rolling yhat of datasets'
+  read_temporal_frame); hours past the stored forecast repeat its last week
+- the weather file at ESCOOTER_WEATHER_FILE (default
+  data/weather_forecast.csv, read by weather.py), then the weather stored
+  with data.csv's future rows, then the (month, hour) climatology of the
+  history
+- cap / floor from data.csv where stored, else the training bounds
+
+One process-wide RollingForecast keeps the feature row and prediction of
+every hour in the horizon. It refreshes only when a source file changed:
+all feature rows are rebuilt (cheap), and only rows that are new or
+changed go to boost_model as one batch. Those are the hours that entered
+the horizon as actuals landed, or hours whose weather was revised. Every
+viewer reads the same cached forecast.
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import datasets
+import intervals
+import prediction_service
+import scenarios
+import weather
+
+MAX_HORIZON_DAYS = 14
+HORIZON_OPTIONS = list(range(7, MAX_HORIZON_DAYS + 1))
+WEATHER_FILE = os.environ.get("ESCOOTER_WEATHER_FILE", "data/weather_forecast.csv")
+SOURCES = datasets.TEMPORAL_SOURCES + [WEATHER_FILE]
+
+
+def _source_version():
+    return tuple(os.path.getmtime(path) if os.path.exists(path) else None for path in SOURCES)
+
+
+def _weekly_fill(series, index):
+    """`series` on `index`, filling hours it doesn't cover with the same hour one, two, ... weeks earlier."""
+    full = series.reindex(series.index.union(index))
+    for _ in range(len(index) // (7 * 24) + 1):
+        if not full.loc[index].isna().any():
+            break
+        full = full.fillna(full.shift(freq="7D").reindex(full.index))
+    return full.loc[index].ffill().bfill()
+
+
+def horizon_features(frame, horizon):
+    """boost_model feature rows for the hours in `horizon` (DatetimeIndex)."""
+    most_frequent, cap, floor = scenarios.temporal_profile()
+    stored = frame.reindex(horizon)
+
+    X = pd.DataFrame(index=horizon)
+    X["hour"] = horizon.hour
+    X["day_of_week"] = horizon.dayofweek
+    X["month"] = horizon.month
+
+    # Weather: forecast file, then stored future rows, then climatology
+    weather_cols = [col for col in weather.WEATHER_COLUMNS if col in most_frequent]
+    forecast = weather.read_optional(WEATHER_FILE)
+    hourly = stored[weather_cols]
+    if forecast is not None:
+        hourly = forecast.reindex(horizon).reindex(columns=weather_cols).combine_first(hourly)
+    history = frame[frame["y"].notna()]
+    X[weather_cols] = weather.fill_from_climatology(hourly, history)
+
+    X["baseline"] = _weekly_fill(frame["baseline"], horizon)
+    X["cap"] = stored["cap"].fillna(cap) if "cap" in stored else cap
+    X["floor"] = stored["floor"].fillna(floor) if "floor" in stored else floor
+
+    for col, value in most_frequent.items():
+        if col not in X.columns:
+            X[col] = value
+        X[col] = X[col].fillna(value)
+    return X[list(most_frequent)]
+
+
+class RollingForecast:
+    def __init__(self):
+        self.version = None
+        self.origin = None
+        self.rows = pd.DataFrame()  # horizon feature rows + "pred", indexed by hour
+        self.actuals = pd.Series(dtype=float)
+        self.refreshes = 0
+        self.rows_predicted = 0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Bring the forecast up to date with the source files; predicts only new or changed rows."""
+        version = _source_version()
+        with self._lock:
+            if version == self.version:
+                return
+
+            frame = datasets.read_temporal_frame()
+            frame.index = pd.to_datetime(frame.index)
+            actuals = frame["y"].dropna()
+            origin = actuals.index.max()
+            horizon = pd.date_range(origin + pd.Timedelta(hours=1), periods=MAX_HORIZON_DAYS * 24, freq="h")
+            X = horizon_features(frame, horizon)
+
+            preds = self.rows["pred"].reindex(horizon) if len(self.rows) else pd.Series(np.nan, index=horizon)
+            if len(self.rows):
+                previous = self.rows.drop(columns="pred").reindex(horizon)
+                unchanged = np.isclose(X.to_numpy(float), previous.to_numpy(float), equal_nan=True).all(axis=1)
+            else:
+                unchanged = np.zeros(len(horizon), dtype=bool)
+
+            todo = ~unchanged | preds.isna().to_numpy()
+            if todo.any():
+                preds[todo] = prediction_service.predict("boost_model", X.loc[todo])
+
+            self.rows = X.assign(pred=preds.to_numpy())
+            self.actuals = actuals
+            self.origin = origin
+            self.version = version
+            self.refreshes += 1
+            self.rows_predicted += int(todo.sum())
+
+    def forecast(self, days=MAX_HORIZON_DAYS, coverage=intervals.COVERAGE):
+        """Next `days` days hourly: DataFrame of ds, pred, lo, hi."""
+        self.refresh()
+        rows = self.rows.iloc[:days * 24]
+        lo, hi = intervals.bounds(rows["pred"], rows.index.hour, coverage)
+        return pd.DataFrame({"ds": rows.index, "pred": rows["pred"].to_numpy(), "lo": lo, "hi": hi})
+
+    def recent_actuals(self, days=2):
+        self.refresh()
+        return self.actuals[self.actuals.index > self.origin - pd.Timedelta(days=days)]
+
+    def stats(self):
+        return {"origin": self.origin, "refreshes": self.refreshes, "rows_predicted": self.rows_predicted}
+
+
+_forecaster = None
+_forecaster_lock = threading.Lock()
+
+
+def get_forecaster():
+    global _forecaster
+    with _forecaster_lock:
+        if _forecaster is None:
+            _forecaster = RollingForecast()
+        return _forecaster
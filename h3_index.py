@@ -0,0 +1,152 @@
+"""
+Precomputed H3 geometry and neighbour index for a set of hexes.
+
+Hex IDs are H3 cells encoded as uint64 (see encode) everywhere in the
+project: datasets, model targets and prediction frames. They only become
+H3 strings at the render boundary (attach_geometry, decode).
+
+An index is built once per hex set (the target hexes of Y_hex / Y_demand,
+the hexes in hex_toolpin) and cached, so per-interaction spatial work is
+array math:
+
+- centroids and hex boundaries
+- local IJ coordinates for vectorized grid distances
+- k-ring adjacency as a CSR sparse matrix for smoothing
+- parent mappings for aggregation to coarser resolutions
+
+Boundaries are served to pydeck as ready-made polygons (see attach_geometry),
+so the browser no longer has to derive hexagon shapes from H3 IDs.
+"""
+from functools import lru_cache
+
+import h3
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+# --- Encoding ---
+def encode(hex_ids):
+    """H3 cells as a uint64 array; strings are parsed once per distinct cell, integers pass through."""
+    values = np.asarray(hex_ids)
+    if values.dtype.kind in "ui":
+        return values.astype(np.uint64, copy=False)
+    codes, cells = pd.factorize(values)
+    return np.array([h3.str_to_int(cell) for cell in cells], dtype=np.uint64)[codes]
+
+
+def decode(codes):
+    """H3 strings for uint64 cells, for rendering only."""
+    cells, inverse = np.unique(encode(codes), return_inverse=True)
+    return np.array([h3.int_to_str(int(cell)) for cell in cells], dtype=object)[inverse]
+
+
+class HexIndex:
+    def __init__(self, hex_ids):
+        self.ids = encode(hex_ids)
+        self.cells = decode(self.ids)  # H3 strings for the h3 calls below and for rendering
+        self.n = len(self.ids)
+        self.resolution = h3.get_resolution(self.cells[0]) if self.n else None
+        self.centroids = np.array([h3.cell_to_latlng(cell) for cell in self.cells]).reshape(-1, 2)
+        # deck.gl wants [lng, lat] rings
+        self.boundaries = [[[lng, lat] for lat, lng in h3.cell_to_boundary(cell)] for cell in self.cells]
+        self.ij = self._local_ij()
+        self._positions = pd.Index(self.ids)
+        self._adjacency = {}
+        self._parents = {}
+
+    def _local_ij(self):
+        """(n, 2) local IJ coordinates anchored at the first hex; NaN where H3 can't unfold."""
+        ij = np.full((self.n, 2), np.nan)
+        for n, cell in enumerate(self.cells):
+            try:
+                ij[n] = h3.cell_to_local_ij(self.cells[0], cell)
+            except h3.H3BaseException:
+                pass  # across a pentagon or too far from the anchor
+        return ij
+
+    # --- Lookups ---
+    def positions(self, hex_ids):
+        """Row of each hex (uint64 or string) in this index (-1 if absent)."""
+        return self._positions.get_indexer(encode(hex_ids))
+
+    # --- Distances ---
+    def grid_distances(self, rows_a, rows_b):
+        """Pairwise H3 grid distance matrix between two sets of index rows."""
+        ij_a, ij_b = self.ij[rows_a], self.ij[rows_b]
+        di = ij_a[:, None, 0] - ij_b[None, :, 0]
+        dj = ij_a[:, None, 1] - ij_b[None, :, 1]
+        dist = np.maximum(np.maximum(np.abs(di), np.abs(dj)), np.abs(di - dj))
+
+        # Fall back to h3.grid_distance for the rare cells without IJ coordinates
+        for a, b in zip(*np.nonzero(np.isnan(dist))):
+            try:
+                dist[a, b] = h3.grid_distance(self.cells[rows_a[a]], self.cells[rows_b[b]])
+            except h3.H3BaseException:
+                dist[a, b] = np.inf
+        return dist
+
+    # --- Neighbourhoods ---
+    def adjacency(self, k=1):
+        """CSR matrix with A[i, j] = 1 when hex j is within k rings of hex i (self included)."""
+        if k not in self._adjacency:
+            rows, cols = [], []
+            for i, cell in enumerate(self.cells):
+                neighbours = self.positions(h3.grid_disk(cell, k))
+                neighbours = neighbours[neighbours >= 0]
+                rows.append(np.full(len(neighbours), i))
+                cols.append(neighbours)
+            rows, cols = np.concatenate(rows), np.concatenate(cols)
+            self._adjacency[k] = sparse.csr_matrix(
+                (np.ones(len(rows)), (rows, cols)), shape=(self.n, self.n)
+            )
+        return self._adjacency[k]
+
+    def smooth(self, values, k=1):
+        """Mean of each hex's k-ring (over hexes present in the index)."""
+        A = self.adjacency(k)
+        return (A @ np.asarray(values, dtype=float)) / np.asarray(A.sum(axis=1)).ravel()
+
+    # --- Coarser Resolutions ---
+    def parents(self, resolution):
+        """(uint64 parent ids, row -> parent position) at a coarser resolution."""
+        if resolution not in self._parents:
+            parent_of = encode([h3.cell_to_parent(cell, resolution) for cell in self.cells])
+            parent_ids, parent_pos = np.unique(parent_of, return_inverse=True)
+            self._parents[resolution] = (parent_ids, parent_pos)
+        return self._parents[resolution]
+
+    def aggregate(self, values, resolution, how="sum"):
+        """Roll per-hex values up to `resolution`; returns (parent ids, values)."""
+        parent_ids, parent_pos = self.parents(resolution)
+        values = np.asarray(values, dtype=float)
+        totals = np.bincount(parent_pos, weights=values, minlength=len(parent_ids))
+        if how == "mean":
+            totals /= np.bincount(parent_pos, minlength=len(parent_ids))
+        return parent_ids, totals
+
+    # --- Rendering ---
+    def attach_geometry(self, df, hex_col="hex_id"):
+        """
+        Copy of `df` ready for pydeck layers: adds polygon, lat and lng columns
+        and turns `hex_col` into H3 strings (JavaScript can't hold uint64).
+        """
+        rows = self.positions(df[hex_col])
+        if (rows < 0).any():
+            raise KeyError(f"{(rows < 0).sum()} hexes in '{hex_col}' are not in this index")
+        df = df.copy()
+        df[hex_col] = self.cells[rows]
+        df["polygon"] = [self.boundaries[row] for row in rows]
+        df["lat"] = self.centroids[rows, 0]
+        df["lng"] = self.centroids[rows, 1]
+        return df
+
+
+@lru_cache(maxsize=16)
+def _build(key):
+    return HexIndex(np.frombuffer(key, dtype=np.uint64))
+
+
+def get_index(hex_ids):
+    """Cached HexIndex for a hex set; built once per distinct set and order."""
+    return _build(encode(hex_ids).tobytes())
@@ -0,0 +1,122 @@
+"""
+Multi-resolution hex pyramid with zoom-driven level of detail.
+
+A HexPyramid precomputes, for one base hex set, a sparse roll-up matrix per
+H3 resolution: two coarser parent levels and one finer child level. Any
+per-hex vector (or a months x hexes matrix) is moved to another level with
+one sparse product. Coarser levels sum their children. The finer level
+splits each hex evenly over its children: the models only predict at the
+base resolution, so street level shows finer geometry, not finer data.
+
+view() picks the resolution for a map zoom (RESOLUTION_OFFSET below zoom,
+clipped to the pyramid) and renders every hex of that level. The decks
+open at DEFAULT_DETAIL, the zoom-10 framing they always had.
+"""
+from functools import lru_cache
+
+import h3
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+import h3_index
+
+# Map zoom presets for the decks' "Map Detail" control
+DETAIL_LEVELS = {
+    "City": 9.0,
+    "District": 10.0,
+    "Neighbourhood": 11.0,
+    "Street": 13.0,
+}
+DEFAULT_DETAIL = "District"
+RESOLUTION_OFFSET = 3  # H3 resolution ~ zoom - 3 keeps hexes a few dozen pixels wide
+
+
+class HexPyramid:
+    def __init__(self, hex_ids, coarser=2, finer=1):
+        self.base = h3_index.get_index(hex_ids)
+        self.base_resolution = self.base.resolution
+        self.levels = {}  # resolution -> (HexIndex, n_base x n_level roll-up matrix)
+
+        n = self.base.n
+        for res in range(max(self.base_resolution - coarser, 0), self.base_resolution):
+            parent_ids, parent_pos = self.base.parents(res)
+            P = sparse.csr_matrix((np.ones(n), (np.arange(n), parent_pos)), shape=(n, len(parent_ids)))
+            self.levels[res] = (h3_index.get_index(parent_ids), P)
+
+        self.levels[self.base_resolution] = (self.base, sparse.identity(n, format="csr"))
+
+        for res in range(self.base_resolution + 1, min(self.base_resolution + finer, 15) + 1):
+            rows, child_ids, shares = [], [], []
+            for row, cell in enumerate(self.base.cells):
+                children = h3.cell_to_children(cell, res)
+                rows.extend([row] * len(children))
+                child_ids.extend(children)
+                shares.extend([1.0 / len(children)] * len(children))
+            P = sparse.csr_matrix((shares, (rows, np.arange(len(child_ids)))), shape=(n, len(child_ids)))
+            self.levels[res] = (h3_index.get_index(h3_index.encode(child_ids)), P)
+
+    @property
+    def resolutions(self):
+        return sorted(self.levels)
+
+    def resolution_for_zoom(self, zoom):
+        res = int(round(zoom)) - RESOLUTION_OFFSET
+        return int(np.clip(res, self.resolutions[0], self.resolutions[-1]))
+
+    def area_ratio(self, resolution):
+        """Hex area at `resolution` relative to the base (about 7x per level)."""
+        return 7.0 ** (self.base_resolution - resolution)
+
+    def roll_up(self, values, resolution):
+        """Move base-level values (vector or rows x hexes matrix) to `resolution`."""
+        _, P = self.levels[resolution]
+        return np.asarray(np.asarray(values, dtype=float) @ P)
+
+    def base_values(self, hex_ids, values):
+        """Scatter values keyed by hex ID into base order (missing hexes are 0)."""
+        out = np.zeros(self.base.n)
+        out[self.base.positions(hex_ids)] = np.asarray(values, dtype=float)
+        return out
+
+    def covering(self, hex_id, resolution):
+        """uint64 IDs at `resolution` that a base hex rolls into (its parent, itself or its children)."""
+        index, P = self.levels[resolution]
+        row = self.base.positions([hex_id])[0]
+        return index.ids[P[row].indices] if row >= 0 else index.ids[:0]
+
+    def level_frame(self, level_values, resolution, value_col="value"):
+        """
+        Hexes of one level, ready for pydeck: hex_id (H3 string), the value
+        column(s), polygon, lat, lng. `level_values` is one vector or a dict
+        of column -> vector.
+        """
+        index, _ = self.levels[resolution]
+        columns = level_values if isinstance(level_values, dict) else {value_col: level_values}
+        df = pd.DataFrame({"hex_id": index.ids})
+        for col, values in columns.items():
+            df[col] = np.asarray(values)
+        return index.attach_geometry(df)
+
+    def view(self, values, zoom, value_col="value"):
+        """
+        Hexes to render for base-level `values` (one vector, or a dict of
+        column -> vector) at a map zoom: (DataFrame of hex_id, value
+        column(s), polygon, lat, lng; resolution used).
+        """
+        resolution = self.resolution_for_zoom(zoom)
+        if isinstance(values, dict):
+            level_values = {col: self.roll_up(v, resolution) for col, v in values.items()}
+        else:
+            level_values = self.roll_up(values, resolution)
+        return self.level_frame(level_values, resolution, value_col), resolution
+
+
+@lru_cache(maxsize=8)
+def _build(key):
+    return HexPyramid(np.frombuffer(key, dtype=np.uint64))
+
+
+def get_pyramid(hex_ids):
+    """Cached HexPyramid for a base hex set."""
+    return _build(h3_index.encode(hex_ids).tobytes())
@@ -0,0 +1,100 @@
+"""
+Import-time report for the dashboard pages.
+
+Every page is registered with st.Page by file path, so its imports only run
+when a user first navigates to it. This script shows what that first
+navigation costs: each page's top-level imports are timed in a fresh
+interpreter (python -X importtime) on top of an already imported streamlit.
+
+Usage:
+    python import_report.py                 # all pages
+    python import_report.py page_temporal.py
+"""
+import ast
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+PAGES = [
+    "streamlit_app.py",
+    "e-scooter.py",
+    "page_dashboard.py",
+    "page_temporal.py",
+    "page_hex_customer.py",
+    "page_hex_operational.py",
+    "page_keplergl.py",
+]
+
+
+# --- Import Discovery ---
+def page_imports(path):
+    """Return the modules a page imports at top level, in source order."""
+    with open(os.path.join(ROOT, path), encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names = [node.module]
+        else:
+            continue
+        modules.extend(name for name in names if name not in modules)
+    return modules
+
+
+# --- Timing ---
+def import_cost(modules):
+    """
+    Time `modules` in a fresh interpreter after streamlit is loaded.
+    Returns ({root package: cumulative µs}, error message or None).
+    """
+    code = "import streamlit\n" + "\n".join(f"import {m}" for m in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        last = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+        return {}, last
+
+    costs = {}
+    after_streamlit = False
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit() or name.startswith("  "):
+            continue  # header row or nested import, already in its parent's total
+        name = name.strip()
+        if not after_streamlit:
+            after_streamlit = name == "streamlit"
+            continue
+        root = name.split(".")[0]
+        costs[root] = costs.get(root, 0) + int(cumulative)
+    return costs, None
+
+
+def report(pages):
+    for page in pages:
+        modules = [m for m in page_imports(page) if m != "streamlit"]
+        print(f"\n{page}")
+        if not modules:
+            print("  streamlit only")
+            continue
+
+        costs, error = import_cost(modules)
+        if error:
+            print(f"  could not import {', '.join(modules)}: {error}")
+            continue
+
+        for root, us in sorted(costs.items(), key=lambda kv: -kv[1]):
+            print(f"  {root:<24}{us / 1000:>9.1f} ms")
+        print(f"  {'total':<24}{sum(costs.values()) / 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    report(sys.argv[1:] or PAGES)
@@ -0,0 +1,117 @@
+"""
+Split-conformal prediction intervals for the scenario decks.
+
+City-level trips (Temporal deck, forward forecast, snapshot): X_forecasting
+holds the historical hourly forecasts (preds) next to the observed trips
+(y). Their relative residuals, (y - preds) / |preds|, are binned by hour of
+day and the lower / upper conformal quantiles of each bin are computed once
+per process and coverage level. An interval is then two multiply-adds on
+top of a point prediction:
+
+    lo = pred + q_lo[hour] * |pred|,  hi = pred + q_hi[hour] * |pred|
+
+Per-hex trips (Consumer deck): xgb_model's own residuals, actual minus
+predicted trips per hex and hour (anomalies.residual_matrix), over the most
+recent CALIBRATION_FRACTION of the X_hex / Y_hex hours, zero-trip hours
+included. Quantiles are taken per hex and hour of day and added to the
+prediction, with the lower bound clipped at 0 trips. The coverage holds
+only if xgb_model was not trained on those hours; if it was, the
+residuals are in-sample and the intervals too narrow.
+
+Neither suits the Operational deck's signed net flow, so that deck shows
+none. Hours with fewer than MIN_BIN_SIZE calibration points fall back to
+the quantiles over all hours (of the hex).
+"""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import anomalies
+import datasets
+
+COVERAGE = 0.8
+COVERAGE_OPTIONS = [0.5, 0.8, 0.9, 0.95]
+MIN_BIN_SIZE = 30
+CALIBRATION_FRACTION = 0.2
+
+
+def _conformal_quantiles(residuals, coverage):
+    """
+    (lower, upper) order statistics with the finite-sample correction of
+    split conformal prediction; per column for a 2-D `residuals`.
+    """
+    r = np.sort(residuals, axis=0)
+    n = len(r)
+    if n == 0:
+        return np.zeros(r.shape[1:]), np.zeros(r.shape[1:])
+    alpha = 1 - coverage
+    k_lo = max(int(np.floor((n + 1) * alpha / 2)), 1)
+    k_hi = min(int(np.ceil((n + 1) * (1 - alpha / 2))), n)
+    return r[k_lo - 1], r[k_hi - 1]
+
+
+@lru_cache(maxsize=None)
+def calibration(coverage=COVERAGE):
+    """(q_lo, q_hi): city-level relative residual quantiles for each hour of day (arrays of 24)."""
+    df = datasets.load_forecasting()
+    df = df[df["preds"].abs() > 1e-9]
+    residuals = ((df["y"] - df["preds"]) / df["preds"].abs()).to_numpy()
+    hours = df.index.hour.to_numpy()
+
+    pooled = _conformal_quantiles(residuals, coverage)
+    q_lo, q_hi = np.full(24, pooled[0]), np.full(24, pooled[1])
+    for hour in range(24):
+        in_bin = residuals[hours == hour]
+        if len(in_bin) >= MIN_BIN_SIZE:
+            q_lo[hour], q_hi[hour] = _conformal_quantiles(in_bin, coverage)
+    return q_lo, q_hi
+
+
+def bounds(preds, hours, coverage=COVERAGE):
+    """(lo, hi) interval bounds for city-level point predictions at the given hour(s) of day."""
+    preds = np.asarray(preds, dtype=float)
+    q_lo, q_hi = calibration(coverage)
+    hours = np.asarray(hours, dtype=int) % 24
+    scale = np.abs(preds)
+    return preds + q_lo[hours] * scale, preds + q_hi[hours] * scale
+
+
+# --- Per-Hex Calibration (Consumer deck) ---
+@lru_cache(maxsize=None)
+def _hex_residuals():
+    """xgb_model residuals over the calibration hours (hours x hexes), and their hours of day."""
+    X, Y = datasets.load_hex_training()
+    start = len(X) - max(int(len(X) * CALIBRATION_FRACTION), 1)
+    X = X.iloc[start:][datasets.model_metadata("xgb_model")["features"]]
+    residuals = anomalies.residual_matrix(X, Y.iloc[start:], datasets.load_model("xgb_model"))
+    return residuals, X.index.hour.to_numpy()
+
+
+@lru_cache(maxsize=None)
+def hex_calibration(coverage=COVERAGE):
+    """
+    (hex_ids, q_lo, q_hi): residual quantiles of each hex for each hour of
+    day (hexes + 1 x 24). The last row pools all hexes, for hex IDs outside
+    xgb_model's targets.
+    """
+    residuals, hours = _hex_residuals()
+    r = residuals.to_numpy()
+    pooled = _conformal_quantiles(r.ravel(), coverage)
+    per_hex = _conformal_quantiles(r, coverage)
+    q_lo = np.tile(np.append(per_hex[0], pooled[0])[:, None], 24)
+    q_hi = np.tile(np.append(per_hex[1], pooled[1])[:, None], 24)
+    for hour in range(24):
+        in_bin = r[hours == hour]
+        if len(in_bin) >= MIN_BIN_SIZE:
+            q_lo[:-1, hour], q_hi[:-1, hour] = _conformal_quantiles(in_bin, coverage)
+    return pd.Index(residuals.columns), q_lo, q_hi
+
+
+def hex_bounds(preds, hex_ids, hours, coverage=COVERAGE):
+    """(lo, hi) interval bounds for xgb_model's per-hex trip predictions at the given hour(s) of day."""
+    preds = np.asarray(preds, dtype=float)
+    calibrated, q_lo, q_hi = hex_calibration(coverage)
+    rows = calibrated.get_indexer(np.asarray(hex_ids, dtype=np.uint64))  # -1 (unknown) picks the pooled row
+    hours = np.asarray(hours, dtype=int) % 24
+    return np.maximum(preds + q_lo[rows, hours], 0), preds + q_hi[rows, hours]
@@ -0,0 +1,194 @@
+"""
+Versioned model bundles: a model in a native, fast-loading format plus the
+schema the dashboard needs to serve it, so pages can predict without
+reading any training CSV.
+
+A bundle is a directory models/<name>/ holding
+
+- model.ubj: the XGBoost model in its Universal Binary JSON format (other
+  model types are stored as model.joblib)
+- metadata.json: format version, model class, feature names and dtypes,
+  target hex IDs (uint64, in output order; empty for single-output
+  models), the feature-default profile the scenario builders start from,
+  and the header of each training CSV the bundle was built from
+
+load() rejects a bundle whose model disagrees with its metadata (feature
+names, categorical dtypes, number of outputs) or whose training CSVs now
+have a different header, i.e. a model/data pair that no longer matches.
+Only the CSV headers are read for that check.
+
+Build bundles from the pickles in models/ and the training data with:
+
+    python model_bundle.py [name ...]
+"""
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+FORMAT_VERSION = 1
+METADATA_FILE = "metadata.json"
+
+
+def _plain(value):
+    """JSON-ready copy of profile values (numpy scalars become Python numbers)."""
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+# --- Feature-Default Profiles ---
+def profile(name, X):
+    """Feature defaults the scenario builders start from, computed from a training frame."""
+    if name == "xgb_model":
+        return {
+            "defaults": {col: X[col].mode()[0] for col in X.columns},
+            "baseline_by_month": X.groupby("month")["baseline"].mean().to_dict(),
+            "baseline_mean": X["baseline"].mean(),
+        }
+    if name == "demand_model":
+        return {"defaults": {col: X[col].median() for col in X.columns}}
+    if name == "boost_model":
+        return {
+            "defaults": {col: X[col].mode()[0] for col in X.columns},
+            "cap": X["cap"].max(),
+            "floor": X["floor"].min(),
+        }
+    raise KeyError(name)
+
+
+def describe(name, model, X, targets, data_files):
+    """Metadata for `model` trained on `X` (targets: uint64 hex IDs, or empty)."""
+    return {
+        "format_version": FORMAT_VERSION,
+        "name": name,
+        "model_class": f"{type(model).__module__}.{type(model).__qualname__}",
+        "features": list(X.columns),
+        "dtypes": {col: str(dtype) for col, dtype in X.dtypes.items()},
+        "targets": [int(t) for t in targets],
+        "profile": _plain(profile(name, X)),
+        "data_headers": {path: _header(path) for path in data_files},
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+# --- Validation ---
+def _header(path):
+    return [str(col) for col in pd.read_csv(path, nrows=0).columns]
+
+
+def _model_features(model):
+    if hasattr(model, "get_booster"):
+        return model.get_booster().feature_names
+    names = getattr(model, "feature_names_in_", None)
+    return None if names is None else list(names)
+
+
+def _model_outputs(model):
+    if hasattr(model, "get_booster"):
+        config = json.loads(model.get_booster().save_config())
+        return max(int(config["learner"]["learner_model_param"]["num_target"]), 1)
+    if hasattr(model, "estimators_") and isinstance(model.estimators_, list):
+        return len(model.estimators_)
+    return None
+
+
+def validate(model, metadata):
+    """Raise ValueError if the model or the training data on disk no longer match `metadata`."""
+    name = metadata.get("name", "model")
+    if metadata.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"{name}: bundle format {metadata.get('format_version')} is not {FORMAT_VERSION}")
+
+    features = _model_features(model)
+    if features is not None and list(features) != metadata["features"]:
+        raise ValueError(f"{name}: model features {features} differ from the bundle's {metadata['features']}")
+
+    if hasattr(model, "get_booster"):
+        types = model.get_booster().feature_types or []
+        for feature, feature_type in zip(metadata["features"], types):
+            dtype = metadata["dtypes"][feature]
+            if (feature_type == "c") != (dtype == "category"):
+                raise ValueError(f"{name}: {feature} is {feature_type} in the model but {dtype} in the bundle")
+
+    outputs = _model_outputs(model)
+    expected = len(metadata["targets"]) or 1
+    if outputs is not None and outputs != expected:
+        raise ValueError(f"{name}: model has {outputs} outputs, bundle lists {expected} targets")
+
+    for path, header in metadata["data_headers"].items():
+        if os.path.exists(path) and _header(path) != header:
+            raise ValueError(f"{name}: the header of {path} changed since the bundle was built; rebuild it")
+
+
+# --- Reading and Writing ---
+def bundle_dir(models_dir, name):
+    return os.path.join(models_dir, name)
+
+
+def exists(models_dir, name):
+    return os.path.exists(os.path.join(bundle_dir(models_dir, name), METADATA_FILE))
+
+
+def read_metadata(models_dir, name):
+    with open(os.path.join(bundle_dir(models_dir, name), METADATA_FILE)) as f:
+        return json.load(f)
+
+
+def load(models_dir, name):
+    """(model, metadata) of a bundle, validated."""
+    metadata = read_metadata(models_dir, name)
+    path = os.path.join(bundle_dir(models_dir, name), metadata["model_file"])
+    if metadata["model_file"].endswith(".ubj"):
+        model = getattr(xgb, metadata["model_class"].rsplit(".", 1)[-1])()
+        model.load_model(path)
+    else:
+        model = joblib.load(path)
+    validate(model, metadata)
+    return model, metadata
+
+
+def save(models_dir, name, model, metadata):
+    """Write a bundle; the metadata goes last, so a half-written bundle is never picked up."""
+    directory = bundle_dir(models_dir, name)
+    os.makedirs(directory, exist_ok=True)
+    if hasattr(model, "get_booster"):
+        metadata = dict(metadata, model_file="model.ubj")
+        model.save_model(os.path.join(directory, "model.ubj"))
+    else:
+        metadata = dict(metadata, model_file="model.joblib")
+        joblib.dump(model, os.path.join(directory, "model.joblib"))
+
+    tmp = os.path.join(directory, f"{METADATA_FILE}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(metadata, f, indent=1)
+    os.replace(tmp, os.path.join(directory, METADATA_FILE))
+    return metadata
+
+
+def build(name):
+    """Bundle models/<name>.pkl with the schema of its training data."""
+    import datasets
+
+    model = datasets.load_pickled_model(name)
+    X, targets = datasets.model_training_schema(name)
+    metadata = describe(name, model, X, targets, datasets.MODEL_DATA_FILES[name])
+    validate(model, metadata)
+    return save(datasets.MODELS_DIR, name, model, metadata)
+
+
+if __name__ == "__main__":
+    import datasets
+
+    for name in sys.argv[1:] or list(datasets.MODEL_FILES):
+        metadata = build(name)
+        print(f"{name}: {len(metadata['features'])} features, {len(metadata['targets'])} targets -> "
+              f"{bundle_dir(datasets.MODELS_DIR, name)}")
@@ -4,8 +4,12 @@ import numpy as np
 import pydeck as pdk
 import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from sklearn.metrics import mean_absolute_percentage_error, mean_squared_error
+
+import anomalies
+import h3_index
+import hex_pyramid
+import trip_store
+from datasets import load_hex_toolpin, load_forecasting
 
 #############################
 # Extended E-Scooter Dashboard
@@ -14,6 +18,7 @@ from sklearn.metrics import mean_absolute_percentage_error, mean_squared_error
 # 2) Monthly map & hex details
 # 3) Trip patterns & usage analysis
 # 4) Forecast error analysis
+# 5) Trip explorer over arbitrary date ranges, hours and hexes
 # Now with integrated month & hex selection in-page and labeled for accessibility.
 #############################
 
@@ -39,31 +44,20 @@ st.markdown(
 #############################
 # 1) Data Loading
 #############################
-@st.cache_data
-def load_hex_data():
-    df = pd.read_csv("data/hex_toolpin.csv")
-    df["year_month"] = pd.to_datetime(df["year_month"].astype(str).str.strip(), format="%Y-%m")
-    return df
-
-
-@st.cache_data
-def load_forecast_data():
-    df = pd.read_csv("data/X_forecasting.csv", parse_dates=["ds"])
-    df.set_index("ds", inplace=True)
-    return df
-
-hex_data = load_hex_data()
-X_forecasting = load_forecast_data()
+hex_data = load_hex_toolpin()
+X_forecasting = load_forecasting()
+pyramid = hex_pyramid.get_pyramid(hex_data["hex_id"].unique())
 
 #############################
 # 2) Create Tabs
 #############################
 st.title("E-Scooter Historical & Forecast Dashboard")
-tab_overview, tab_map, tab_patterns, tab_analysis = st.tabs([
+tab_overview, tab_map, tab_patterns, tab_analysis, tab_explorer = st.tabs([
     "High-Level Overview",
     "Monthly Hex Map",
     "Usage Patterns",
-    "Forecast Analysis"
+    "Forecast Analysis",
+    "Trip Explorer"
 ])
 
 #############################
@@ -77,15 +71,43 @@ def compute_rgba(count, cmin, cmax):
     g = int(255 * (1 - ratio))
     return (r, g, 0, 250)
 
+#############################
+# HELPER: Monthly Trips per Resolution
+#############################
+@st.cache_resource
+def monthly_trip_levels():
+    """Months x hexes trip counts, rolled up once to every pyramid resolution."""
+    trips = hex_data.pivot_table(
+        index="year_month", columns="hex_id", values="trip_count", aggfunc="sum", fill_value=0
+    ).reindex(columns=pyramid.base.ids, fill_value=0)
+    levels = {res: pyramid.roll_up(trips.to_numpy(), res) for res in pyramid.resolutions}
+    return trips.index, levels
+
 #############################
 # HELPER: Build Monthly Map
 #############################
-def build_deck_for_month(ym, highlight_hex=None):
+def build_deck_for_month(ym, highlight_hex=None, detail=None, show_anomalies=False):
+    """
+    Deck at the chosen map detail, plus the base-level rows of the month for
+    the info panel; with `show_anomalies`, a marker on each hex with
+    anomalous hours that month (see anomalies.py).
+    """
     df_month = hex_data[hex_data["year_month"] == ym].copy()
     if df_month.empty:
         return None, df_month
 
-    # Use fixed color scale across months (hardcoded or percentiles)
+    zoom = hex_pyramid.DETAIL_LEVELS[detail or hex_pyramid.DEFAULT_DETAIL]
+    resolution = pyramid.resolution_for_zoom(zoom)
+    ratio = pyramid.area_ratio(resolution)
+    lat, lng = 41.8781, -87.6298
+    if highlight_hex and resolution > pyramid.base_resolution:
+        lat, lng = pyramid.base.centroids[pyramid.base.positions([highlight_hex])[0]]
+
+    months, levels = monthly_trip_levels()
+    df_level = pyramid.level_frame(levels[resolution][months.get_loc(ym)], resolution, value_col="trip_count")
+    df_level = df_level[df_level["trip_count"] > 0].reset_index(drop=True)
+
+    # Use fixed color scale across months (hardcoded or percentiles), per base-hex area
     cmin = df_month["trip_count"].min()
     cmax = df_month["trip_count"].max()
 
@@ -97,36 +119,128 @@ def build_deck_for_month(ym, highlight_hex=None):
         g = int(255 * (1 - ratio))
         return (r, g, 0, 250)
 
-    color_df = df_month["trip_count"].apply(compute_rgba).apply(pd.Series)
+    color_df = (df_level["trip_count"] / ratio).apply(compute_rgba).apply(pd.Series)
     color_df.columns = ["colorR", "colorG", "colorB", "colorA"]
-    df_month = pd.concat([df_month, color_df], axis=1)
+    df_level = pd.concat([df_level, color_df], axis=1)
 
-    # Highlight selected hex in bright blue
+    # Highlight selected hex (or the level hexes covering it) in bright blue
     if highlight_hex:
-        df_month.loc[df_month.hex_id == highlight_hex, ["colorR", "colorG", "colorB", "colorA"]] = [0, 0, 255, 255]
+        covering = df_level.hex_id.isin(h3_index.decode(pyramid.covering(highlight_hex, resolution)))
+        df_level.loc[covering, ["colorR", "colorG", "colorB", "colorA"]] = [0, 0, 255, 255]
+
+    df_level["label"] = [
+        f"Hex {hex_id}\nTrips: {trips:.0f}" for hex_id, trips in zip(df_level["hex_id"], df_level["trip_count"])
+    ]
 
     hex_layer = pdk.Layer(
-        "H3HexagonLayer",
-        data=df_month,
-        get_hexagon="hex_id",
+        "PolygonLayer",
+        data=df_level,
+        get_polygon="polygon",
         get_elevation="trip_count",
-        elevation_scale=0.5,
+        elevation_scale=0.5 / ratio,
         extruded=True,
-        coverage=1,
         pickable=True,
         get_fill_color=["colorR", "colorG", "colorB", "colorA"]
     )
 
-    view = pdk.ViewState(latitude=41.8781, longitude=-87.6298, zoom=10, pitch=45)
+    layers = [hex_layer]
+    if show_anomalies:
+        df_anomalies = month_anomalies(ym)
+        if not df_anomalies.empty:
+            layers.append(pdk.Layer(
+                "ScatterplotLayer",
+                data=df_anomalies,
+                get_position=["lng", "lat"],
+                get_radius="radius",
+                get_fill_color=[255, 0, 255, 200],
+                get_line_color=[255, 255, 255, 255],
+                stroked=True,
+                pickable=True,
+            ))
+
+    view = pdk.ViewState(latitude=lat, longitude=lng, zoom=zoom, pitch=45)
     deck = pdk.Deck(
-        layers=[hex_layer],
+        layers=layers,
         initial_view_state=view,
         map_provider="carto",
-        map_style="light"
+        map_style="light",
+        tooltip={"text": "{label}"}
     )
 
     return deck, df_month
 
+#############################
+# HELPER: Anomaly Overlay
+#############################
+def month_anomalies(ym):
+    """Hexes with anomalous hours in a month, as markers at their centroids (base resolution)."""
+    counts = anomalies.monthly_counts()
+    df = counts[counts["year_month"] == ym]
+    rows = pyramid.base.positions(df["hex_id"])
+    df = df[rows >= 0].reset_index(drop=True)
+    rows = rows[rows >= 0]
+    df["lat"], df["lng"] = pyramid.base.centroids[rows, 0], pyramid.base.centroids[rows, 1]
+    df["radius"] = 40 + 25 * np.sqrt(df["anomalies"])
+    df["label"] = [
+        f"Hex {hex_id}\nAnomalous hours: {n} (max |z| {z:.1f})"
+        for hex_id, n, z in zip(h3_index.decode(df["hex_id"]), df["anomalies"], df["max_z"])
+    ]
+    return df[["lat", "lng", "radius", "label"]]
+
+#############################
+# HELPER: Trip Explorer Queries
+#############################
+@st.cache_resource
+def explorer_pyramid():
+    return hex_pyramid.get_pyramid(trip_store.hourly_hex_ids())
+
+
+@st.cache_data(show_spinner=False)
+def query_window(start, end, hours, hex_subset):
+    """Per-hex, per-day and per-hour trips for one filter set, aggregated by DuckDB."""
+    hex_ids = h3_index.encode(list(hex_subset)) if hex_subset else None
+    return (
+        trip_store.hex_trips(start, end, hours, hex_ids),
+        trip_store.daily_trips(start, end, hours, hex_ids),
+        trip_store.hourly_profile(start, end, hours, hex_ids),
+    )
+
+
+def build_deck_for_window(df_trips, detail=None):
+    """Deck of trips per hex for a query window, at the chosen map detail."""
+    pyramid = explorer_pyramid()
+    zoom = hex_pyramid.DETAIL_LEVELS[detail or hex_pyramid.DEFAULT_DETAIL]
+    base_values = pyramid.base_values(df_trips["hex_id"], df_trips["trips"])
+    df_level, resolution = pyramid.view(base_values, zoom, value_col="trips")
+    df_level = df_level[df_level["trips"] > 0].reset_index(drop=True)
+    ratio = pyramid.area_ratio(resolution)
+
+    per_base = df_level["trips"] / ratio
+    cmin, cmax = per_base.min(), per_base.max()
+    color_df = per_base.apply(lambda x: compute_rgba(x, cmin, cmax)).apply(pd.Series)
+    color_df.columns = ["colorR", "colorG", "colorB", "colorA"]
+    df_level = pd.concat([df_level, color_df], axis=1)
+
+    hex_layer = pdk.Layer(
+        "PolygonLayer",
+        data=df_level,
+        get_polygon="polygon",
+        get_elevation="trips",
+        elevation_scale=0.5 / ratio,
+        extruded=True,
+        pickable=True,
+        get_fill_color=["colorR", "colorG", "colorB", "colorA"]
+    )
+
+    view = pdk.ViewState(latitude=41.8781, longitude=-87.6298, zoom=zoom, pitch=45)
+    return pdk.Deck(
+        layers=[hex_layer],
+        initial_view_state=view,
+        map_provider="carto",
+        map_style="light",
+        tooltip={"text": "Hex {hex_id}\nTrips: {trips}"}
+    )
+
 #############################
 # TAB 1: High-Level Overview
 #############################
@@ -134,7 +248,7 @@ with tab_overview:
     st.subheader("Forecast Overview")
 
     # Build plot with actual vs. forecast
-    fig_future = make_subplots(rows=1, cols=1)
+    fig_future = go.Figure()
 
     fig_future.add_trace(go.Scatter(
         x=X_forecasting.index,
@@ -175,8 +289,10 @@ with tab_overview:
 
     # Evaluate forecast accuracy
     eval_df = X_forecasting.loc[X_forecasting['y'] > 0].copy()
-    mape_val = mean_absolute_percentage_error(eval_df['y'], eval_df['preds']) * 100
-    rmse_val = mean_squared_error(eval_df['y'], eval_df['preds'])
+    # Plain NumPy metrics keep sklearn out of the page's import cost
+    eval_err = eval_df['y'].to_numpy() - eval_df['preds'].to_numpy()
+    mape_val = np.mean(np.abs(eval_err) / eval_df['y'].to_numpy()) * 100
+    rmse_val = np.mean(eval_err ** 2)
 
     c_over1, c_over2 = st.columns(2)
     c_over1.metric("MAPE (Days with Actual)", f"{mape_val:.2f}%")
@@ -193,7 +309,7 @@ with tab_overview:
 with tab_map:
     st.subheader("Monthly Trip Distribution")
 
-    col_sel1, col_sel2 = st.columns(2)
+    col_sel1, col_sel2, col_sel3 = st.columns(3)
 
     with col_sel1:
         st.markdown("**Select Month**")
@@ -205,9 +321,19 @@ with tab_map:
             label_visibility="collapsed"
         )
 
+    with col_sel3:
+        st.markdown("**Map Detail**")
+        detail = st.select_slider(
+            "Map Detail (hidden label for accessibility)",
+            options=list(hex_pyramid.DETAIL_LEVELS),
+            value=hex_pyramid.DEFAULT_DETAIL,
+            label_visibility="collapsed"
+        )
+        show_anomalies = st.checkbox("Overlay anomalies", value=True)
+
     month_dt = pd.to_datetime(month_str, format="%Y-%m")
 
-    deck, df_month = build_deck_for_month(month_dt)
+    deck, df_month = build_deck_for_month(month_dt, detail=detail)
 
     if df_month.empty:
         st.warning("No data available for the selected month.")
@@ -224,7 +350,9 @@ with tab_map:
             )
 
         selected_hex = hex_ids[index]
-        deck_highlight, df_month = build_deck_for_month(month_dt, highlight_hex=selected_hex)
+        deck_highlight, df_month = build_deck_for_month(
+            month_dt, highlight_hex=selected_hex, detail=detail, show_anomalies=show_anomalies
+        )
 
         col_map, col_info = st.columns([3, 2])
         with col_map:
@@ -242,6 +370,16 @@ with tab_map:
             c3.metric("Avg Duration", f"{hex_row['avg_duration']:.0f} s")
             c4.metric("Net Acc.", f"{int(hex_row['net_accumulation'])}")
 
+            hex_anomalies = anomalies.monthly_counts()
+            hex_anomalies = hex_anomalies[
+                (hex_anomalies["year_month"] == month_dt) & (hex_anomalies["hex_id"] == selected_hex)
+            ]
+            if not hex_anomalies.empty:
+                st.caption(
+                    f"{int(hex_anomalies['anomalies'].iloc[0])} anomalous hours this month "
+                    f"(max |z| {hex_anomalies['max_z'].iloc[0]:.1f})"
+                )
+
             breakdown_df = pd.DataFrame({
                 "Trip Type": ["Incoming", "Outgoing", "Local"],
                 "Count": [
@@ -336,9 +474,17 @@ with tab_analysis:
             y="y",
             title="Actual vs. Forecasted Trips",
             labels={"preds": "Forecasted Trips", "y": "Actual Trips"},
-            trendline="ols",
             opacity=0.6
         )
+        # OLS trendline via np.polyfit; plotly's trendline="ols" would import statsmodels
+        slope, intercept = np.polyfit(df_eval["preds"], df_eval["y"], 1)
+        trend_x = np.array([df_eval["preds"].min(), df_eval["preds"].max()])
+        fig_scatter.add_trace(go.Scatter(
+            x=trend_x,
+            y=slope * trend_x + intercept,
+            mode="lines",
+            name="OLS trendline"
+        ))
         st.plotly_chart(fig_scatter, use_container_width=True)
 
         fig_resid = px.histogram(
@@ -362,6 +508,72 @@ with tab_analysis:
     in the scatter plot indicate big misses. The residual histogram shows whether errors are centered near zero 
     or skewed.""")
 
+#############################
+# TAB 5: Trip Explorer
+#############################
+with tab_explorer:
+    st.subheader("Trips by Time Window, Hour & Hex")
+
+    first_ts, last_ts = trip_store.time_range()
+    col_q1, col_q2, col_q3 = st.columns(3)
+
+    with col_q1:
+        date_range = st.date_input(
+            "Date Range",
+            value=(first_ts.date(), last_ts.date()),
+            min_value=first_ts.date(),
+            max_value=last_ts.date()
+        )
+    with col_q2:
+        hour_from, hour_to = st.slider("Hours of Day", 0, 23, (0, 23))
+    with col_q3:
+        explorer_detail = st.select_slider(
+            "Map Detail",
+            options=list(hex_pyramid.DETAIL_LEVELS),
+            value=hex_pyramid.DEFAULT_DETAIL,
+            key="explorer_detail"
+        )
+
+    hex_subset = st.multiselect(
+        "Limit to Hexes (optional)",
+        options=h3_index.decode(explorer_pyramid().base.ids).tolist()
+    )
+
+    # date_input returns a single date while the user is still picking the range end
+    start_date, end_date = (date_range if len(date_range) == 2 else (date_range[0], date_range[0]))
+    hours = None if (hour_from, hour_to) == (0, 23) else tuple(range(hour_from, hour_to + 1))
+    df_trips, df_daily, df_hourly = query_window(
+        pd.Timestamp(start_date), pd.Timestamp(end_date) + pd.Timedelta(days=1), hours, tuple(hex_subset)
+    )
+
+    if df_trips.empty:
+        st.warning("No trips match the selected filters.")
+    else:
+        c_q1, c_q2, c_q3 = st.columns(3)
+        c_q1.metric("Total Trips", f"{int(df_trips['trips'].sum())}")
+        c_q2.metric("Active Hexes", f"{len(df_trips)}")
+        c_q3.metric("Avg Trips/Day", f"{df_daily['trips'].mean():.1f}")
+
+        col_map, col_charts = st.columns([3, 2])
+        with col_map:
+            st.pydeck_chart(build_deck_for_window(df_trips, explorer_detail))
+
+        with col_charts:
+            fig_daily = px.line(df_daily, x="day", y="trips", title="Trips per Day")
+            fig_daily.update_layout(xaxis_title="Day", yaxis_title="Trips", height=250)
+            st.plotly_chart(fig_daily, use_container_width=True)
+
+            fig_hourly = px.bar(df_hourly, x="hour", y="trips", title="Average Trips by Hour of Day")
+            fig_hourly.update_layout(xaxis_title="Hour of Day", yaxis_title="Trips per Day", height=250)
+            st.plotly_chart(fig_hourly, use_container_width=True)
+
+        st.markdown("**Top Hexes**")
+        top_hexes = df_trips.head(20)
+        st.dataframe(top_hexes.assign(hex_id=h3_index.decode(top_hexes["hex_id"])), hide_index=True)
+
+    st.write("""Queries run on DuckDB over Parquet copies of the hourly hex trips, so any window,
+    hour range or set of hexes is aggregated on demand instead of being loaded into pandas.""")
+
 #############################
 # FINAL NOTES
 #############################
@@ -1,24 +1,13 @@
 import streamlit as st
 import pandas as pd
 import pydeck as pdk
-import pickle
 
-# --- Load Model and Data ---
-@st.cache_resource
-def load_model():
-    with open("models/xgb_model.pkl", "rb") as f:
-        return pickle.load(f)
-
-@st.cache_data
-def load_data():
-    X_hex = pd.read_csv("data/X_hex.csv", index_col=0, parse_dates=True)
-    Y_hex = pd.read_csv("data/Y_hex.csv")
-    return X_hex, Y_hex
-
-xgb_model = load_model()
-X_hex, Y_hex = load_data()
-model_features = X_hex.columns.tolist()
-target_columns = Y_hex.columns.tolist()
+import attribution_panel
+import h3_index
+import hex_pyramid
+import intervals
+import scenarios
+import weather_input
 
 # --- Default Weather Values ---
 BASE_TEMP = 15.0
@@ -28,44 +17,17 @@ BASE_RAIN = 0.0
 BASE_CLOUDS = 50
 
 # --- Build Scenario Predictions ---
-def build_scenario_predictions(hour, day_of_week, month, temp, humidity, wind, rain, clouds, selected_team=None):
-    """
-    Create a scenario DataFrame using most frequent values,
-    override scenario-relevant features, and return melted predictions.
-    """
-    # Start from mode values for all features
-    most_frequent = {col: X_hex[col].mode()[0] for col in model_features}
-    df = pd.DataFrame([most_frequent])
-
-    # Override weather and time features
-    df["hour"] = hour
-    df["day_of_week"] = day_of_week
-    df["month"] = month
-    df["temp"] = temp
-    df["humidity"] = humidity
-    df["wind_speed"] = wind
-    df["rain_1h"] = rain
-    df["clouds_all"] = clouds
-
-    # --- Dynamically set baseline to mean of selected month ---
-    baseline_month = X_hex[X_hex["month"] == month]
-    if not baseline_month.empty and "baseline" in baseline_month.columns:
-        df["baseline"] = baseline_month["baseline"].mean()
-    else:
-        df["baseline"] = X_hex["baseline"].mean()  # fallback if month filter returns nothing
-
-    # Reset all team flags to 0
-    df["Team_ChicagoBulls"] = 0
-    df["Team_FireFC"] = 0
-    df["Team_StarsFC"] = 0
-
-    # Set selected team flag
-    if selected_team:
-        df[f"Team_{selected_team}"] = 1
-
-    preds = xgb_model.predict(df[model_features])
-    preds_df = pd.DataFrame(preds, columns=target_columns)
-    return preds_df.melt(var_name="hex_id", value_name="pred_trip")
+def build_scenario_predictions(hour, day_of_week, month, temp, humidity, wind, rain, clouds, selected_team=None,
+                               coverage=intervals.COVERAGE):
+    """Melted per-hex predictions and interval bounds, batched with other sessions by prediction_service."""
+    return scenarios.customer_predictions(
+        hour, day_of_week, month, temp, humidity, wind, rain, clouds, selected_team, coverage
+    )
+
+def submit_scenario_contributions(hour, day_of_week, month, temp, humidity, wind, rain, clouds, selected_team=None):
+    """Future of the per-hex feature attributions of one scenario, cached per scenario by scenarios."""
+    X = scenarios.customer_features(hour, day_of_week, month, temp, humidity, wind, rain, clouds, selected_team)
+    return scenarios.submit_contributions("xgb_model", X)
 
 # --- Map Coloring ---
 def compute_rgba(count, cmin, cmax):
@@ -77,8 +39,31 @@ def compute_rgba(count, cmin, cmax):
     return (r, g, 0, 255)
 
 # --- Build Pydeck Layer ---
-def build_deck_for_hour(hour, day_of_week, month, temp, humidity, wind, rain, clouds):
-    preds = build_scenario_predictions(hour, day_of_week, month, temp, humidity, wind, rain, clouds)
+def build_deck_for_hour(preds, smooth=False, detail=None, coverage=None):
+    """
+    Deck of one scenario's predicted trips; with a `coverage`, a translucent
+    shell rises to the interval's upper bound, and if `preds` carries
+    contrib_ columns the tooltip lists each hex's top features.
+    """
+    value_cols = ["pred_trip", "pred_trip_lo", "pred_trip_hi"]
+    # Contributions are additive, so they smooth and roll up like the predictions
+    contrib_cols = [col for col in preds.columns if col.startswith(scenarios.CONTRIB_PREFIX)]
+    explain = bool(contrib_cols)
+    if smooth:
+        index = h3_index.get_index(preds["hex_id"])
+        preds = preds.copy()
+        for col in value_cols + contrib_cols:
+            preds[col] = index.smooth(preds[col])
+
+    # Roll up (or split) to the resolution for the chosen map detail
+    pyramid = hex_pyramid.get_pyramid(preds["hex_id"])
+    zoom = hex_pyramid.DETAIL_LEVELS[detail or hex_pyramid.DEFAULT_DETAIL]
+    preds, resolution = pyramid.view({col: preds[col] for col in value_cols + contrib_cols}, zoom)
+    preds[value_cols] = preds[value_cols].round(1)
+    if explain:
+        preds["drivers"] = attribution_panel.top_drivers(preds)
+        preds = preds.drop(columns=contrib_cols)
+    elevation_scale = 100 / pyramid.area_ratio(resolution)
 
     cmin, cmax = preds["pred_trip"].min(), preds["pred_trip"].max()
     color_df = preds["pred_trip"].apply(lambda x: compute_rgba(x, cmin, cmax))
@@ -88,24 +73,42 @@ def build_deck_for_hour(hour, day_of_week, month, temp, humidity, wind, rain, cl
     data = preds.to_dict(orient="records")
 
     layer = pdk.Layer(
-        "H3HexagonLayer",
+        "PolygonLayer",
         data=data,
-        get_hexagon="hex_id",
+        get_polygon="polygon",
         get_elevation="pred_trip",
-        elevation_scale=100,
+        elevation_scale=elevation_scale,
         extruded=True,
-        coverage=1,
         pickable=True,
         get_fill_color=["colorR", "colorG", "colorB", "colorA"]
     )
 
-    view = pdk.ViewState(latitude=41.8781, longitude=-87.6298, zoom=10, pitch=45)
+    layers = [layer]
+    tooltip = "Hex {hex_id}\nPredicted Trips: {pred_trip}"
+    if coverage:
+        layers.append(pdk.Layer(
+            "PolygonLayer",
+            data=data,
+            get_polygon="polygon",
+            get_elevation="pred_trip_hi",
+            elevation_scale=elevation_scale,
+            extruded=True,
+            wireframe=True,
+            pickable=False,
+            get_fill_color=[120, 120, 120, 40],
+            get_line_color=[80, 80, 80, 120]
+        ))
+        tooltip += f"\n{coverage:.0%} Interval: {{pred_trip_lo}} to {{pred_trip_hi}}"
+    if explain:
+        tooltip += "\nTop Drivers: {drivers}"
+
+    view = pdk.ViewState(latitude=41.8781, longitude=-87.6298, zoom=zoom, pitch=45)
     return pdk.Deck(
-        layers=[layer],
+        layers=layers,
         initial_view_state=view,
         map_provider="carto",
         map_style="light",
-        tooltip={"text": "Hex {hex_id}\nPredicted Trips: {pred_trip}"}
+        tooltip={"text": tooltip}
     )
 
 # --- Streamlit Interface ---
@@ -120,6 +123,55 @@ humidity = st.sidebar.slider("Humidity (%)", 0, 100, BASE_HUMIDITY)
 wind = st.sidebar.slider("Wind Speed (m/s)", 0.0, 20.0, BASE_WIND, step=0.5)
 rain = st.sidebar.slider("Rainfall (mm/h)", 0.0, 10.0, BASE_RAIN, step=0.1)
 clouds = st.sidebar.slider("Cloud Cover (%)", 0, 100, BASE_CLOUDS)
-
-deck = build_deck_for_hour(hour, day_of_week, month, temp, humidity, wind, rain, clouds)
-st.pydeck_chart(deck)
+smooth = st.sidebar.checkbox("Smooth over neighbouring hexes", value=False)
+detail = st.sidebar.select_slider(
+    "Map Detail", options=list(hex_pyramid.DETAIL_LEVELS),
+    value=hex_pyramid.DEFAULT_DETAIL
+)
+show_interval = st.sidebar.checkbox("Show prediction interval", value=True)
+coverage = st.sidebar.select_slider(
+    "Interval Coverage", options=intervals.COVERAGE_OPTIONS, value=intervals.COVERAGE,
+    format_func=lambda c: f"{c:.0%}", disabled=not show_interval
+)
+explain = st.sidebar.checkbox("Explain predictions", value=False)
+
+preds = build_scenario_predictions(
+    hour, day_of_week, month, temp, humidity, wind, rain, clouds, coverage=coverage
+)
+interval = coverage if show_interval else None
+# Tree SHAP is much slower than the prediction, so the page never waits for it:
+# until it is in, the map has no drivers and the panel polls for it.
+contribs = None
+if explain:
+    contribs = submit_scenario_contributions(hour, day_of_week, month, temp, humidity, wind, rain, clouds)
+if contribs is not None and scenarios.contributions_ready(contribs):
+    preds = preds.join(scenarios.contribution_frame("xgb_model", contribs.result()))
+deck = build_deck_for_hour(preds, smooth, detail, interval)
+if explain:
+    map_col, explain_col = st.columns([3, 1])
+    map_col.pydeck_chart(deck)
+    with explain_col:
+        st.markdown("#### Why This Prediction?")
+        if attribution_panel.contribution_features(preds):
+            attribution_panel.show_attributions(preds, "pred_trip", "customer")
+        else:
+            attribution_panel.await_contributions(contribs)
+else:
+    st.pydeck_chart(deck)
+
+# --- Weather File Scenario ---
+st.markdown("""
+### Weather File Scenario
+
+Upload or paste an hourly weather forecast (up to two weeks) to predict trips
+for every hex and hour. The file is scored a day at a time, and each day's
+per-hex results appear as soon as they are ready.
+""")
+weather_df = weather_input.weather_file_input("customer")
+if weather_df is not None and st.button("Score Weather File", key="customer_score"):
+    chunks = scenarios.stream_hex_weather_predictions("xgb_model", weather_df, "pred_trip", coverage=coverage)
+    result = weather_input.show_hex_stream(chunks, "pred_trip", weather_df.index.normalize().nunique())
+    st.download_button(
+        "Download Per-Hex Predictions (CSV)", data=result.to_csv(index=False),
+        file_name="weather_scenario_hexes.csv", mime="text/csv"
+    )
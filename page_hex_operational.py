@@ -2,25 +2,13 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import pydeck as pdk
-import pickle
-import matplotlib.pyplot as plt
-import seaborn as sns
 
-# --- Load Model and Data ---
-@st.cache_data(show_spinner=False)
-def load_data():
-    with open("models/demand_model.pkl", "rb") as f:
-        demand_model = pickle.load(f)
-
-    X_demand = pd.read_csv("data/X_demand.csv", index_col=0, parse_dates=True)
-    model_features = X_demand.columns.tolist()
-
-    Y_demand = pd.read_csv("data/Y_demand.csv")
-    target_columns = Y_demand.columns.tolist()
-
-    return demand_model, X_demand, model_features, target_columns
-
-demand_model, X_demand, model_features, target_columns = load_data()
+import attribution_panel
+import h3_index
+import hex_pyramid
+import rebalancing
+import scenarios
+import weather_input
 
 # --- Default Weather Values ---
 BASE_TEMP = 15.0
@@ -31,42 +19,15 @@ BASE_CLOUDS = 50
 
 # --- Scenario Builder ---
 def build_scenario_predictions(net_flow_hour, weekday, month, temp, humidity, wind, rain, clouds, selected_team):
-    # Use median values from the dataset as defaults
-    base_values = {col: X_demand[col].median() for col in model_features}
-    df = pd.DataFrame([base_values])
-
-    # Override relevant features
-    df["hour"] = net_flow_hour
-    df["day_of_week"] = weekday
-    df["month"] = month
-    df["temp"] = temp
-    df["humidity"] = humidity
-    df["wind_speed"] = wind
-    df["rain_1h"] = rain
-    df["clouds_all"] = clouds
-    df["baseline"] = 1000
-
-    # Reset team flags
-    df["Team_ChicagoBulls"] = 0
-    df["Team_FireFC"] = 0
-    df["Team_StarsFC"] = 0
-
-    if selected_team == "ChicagoBulls":
-        df["Team_ChicagoBulls"] = 1
-    elif selected_team == "FireFC":
-        df["Team_FireFC"] = 1
-    elif selected_team == "StarsFC":
-        df["Team_StarsFC"] = 1
-
-    # Fill any missing columns
-    for col in set(model_features) - set(df.columns):
-        df[col] = 0
-    df = df[model_features]
-
-    # Predict and reshape
-    preds = demand_model.predict(df)
-    preds_df = pd.DataFrame(preds, columns=target_columns)
-    return preds_df.melt(var_name="hex_id", value_name="pred_demand")
+    """Melted per-hex net flow, batched with other sessions by prediction_service."""
+    return scenarios.operational_predictions(
+        net_flow_hour, weekday, month, temp, humidity, wind, rain, clouds, selected_team
+    )
+
+def submit_scenario_contributions(net_flow_hour, weekday, month, temp, humidity, wind, rain, clouds, selected_team):
+    """Future of the per-hex feature attributions of one scenario, cached per scenario by scenarios."""
+    X = scenarios.operational_features(net_flow_hour, weekday, month, temp, humidity, wind, rain, clouds, selected_team)
+    return scenarios.submit_contributions("demand_model", X)
 
 # --- Color Scaling ---
 def compute_rgba(value, min_val, max_val):
@@ -84,41 +45,84 @@ def compute_rgba(value, min_val, max_val):
         return tuple((green + ratio * (blue - green)).astype(int))
 
 # --- Build Pydeck Map ---
-def build_deck_for_hour(net_flow_hour, weekday, month, temp, humidity, wind, rain, clouds, selected_team):
-    preds = build_scenario_predictions(net_flow_hour, weekday, month, temp, humidity, wind, rain, clouds, selected_team)
+def build_deck_for_hour(preds, moves=None, detail=None):
+    """Deck of one scenario's net flow; with contrib_ columns in `preds` the tooltip lists top features."""
     if preds.empty:
         view = pdk.ViewState(latitude=41.8781, longitude=-87.6298, zoom=10, pitch=45)
         return pdk.Deck(layers=[], initial_view_state=view, tooltip={"text": "No data available"})
 
-    preds["adj_demand"] = preds["pred_demand"]
+    # Roll up (or split) to the resolution for the chosen map detail
+    pyramid = hex_pyramid.get_pyramid(preds["hex_id"])
+    zoom = hex_pyramid.DETAIL_LEVELS[detail or hex_pyramid.DEFAULT_DETAIL]
+    # Contributions are additive, so they roll up like the net flow
+    contrib_cols = [col for col in preds.columns if col.startswith(scenarios.CONTRIB_PREFIX)]
+    explain = bool(contrib_cols)
+    preds, resolution = pyramid.view(
+        {"adj_demand": preds["pred_demand"], **{col: preds[col] for col in contrib_cols}}, zoom
+    )
+    preds["adj_demand"] = preds["adj_demand"].round(1)
+    if explain:
+        preds["drivers"] = attribution_panel.top_drivers(preds)
+        preds = preds.drop(columns=contrib_cols)
+    ratio = pyramid.area_ratio(resolution)
+
+    # Colors and heights are per base-hex area so levels stay comparable
     cmin, cmax = preds["adj_demand"].min(), preds["adj_demand"].max()
 
-    color_df = preds["adj_demand"].apply(lambda x: compute_rgba(x, cmin, cmax))
+    color_df = (preds["adj_demand"] / ratio).apply(lambda x: compute_rgba(x, cmin, cmax))
     color_df = pd.DataFrame(color_df.tolist(), columns=["colorR", "colorG", "colorB", "colorA"])
     preds = pd.concat([preds, color_df], axis=1)
-    preds["elev"] = preds["adj_demand"].abs()
+    preds["elev"] = preds["adj_demand"].abs() / ratio
 
     data = preds.to_dict(orient="records")
 
     layer = pdk.Layer(
-        "H3HexagonLayer",
+        "PolygonLayer",
         data=data,
-        get_hexagon="hex_id",
+        get_polygon="polygon",
         get_elevation="elev",
         elevation_scale=500,
         extruded=True,
-        coverage=1,
         pickable=True,
         get_fill_color=["colorR", "colorG", "colorB", "colorA"]
     )
 
-    view = pdk.ViewState(latitude=41.8781, longitude=-87.6298, zoom=10, pitch=45)
+    layers = [layer]
+    tooltip = "Hex {hex_id}\nPredicted Demand: {adj_demand}"
+    if explain:
+        tooltip += "\nTop Drivers: {drivers}"
+
+    if moves is not None and not moves.empty:
+        layers.append(pdk.Layer(
+            "ArcLayer",
+            data=moves[["count", "from_lat", "from_lng", "to_lat", "to_lng"]],
+            get_source_position=["from_lng", "from_lat"],
+            get_target_position=["to_lng", "to_lat"],
+            get_source_color=[255, 0, 0, 200],
+            get_target_color=[0, 0, 255, 200],
+            get_width="count",
+            width_scale=2,
+            pickable=True,
+        ))
+
+    view = pdk.ViewState(latitude=41.8781, longitude=-87.6298, zoom=zoom, pitch=45)
     return pdk.Deck(
-        layers=[layer],
+        layers=layers,
         initial_view_state=view,
         map_provider="carto",
         map_style="light",
-        tooltip={"text": "Hex {hex_id}\nPredicted Demand: {adj_demand}"}
+        tooltip={"text": tooltip}
+    )
+
+# --- Rebalancing Plan ---
+@st.cache_data(show_spinner=False)
+def plan_rebalancing(weekday, month, temp, humidity, wind, rain, clouds, selected_team):
+    """Moves for all four 6-hour windows of one scenario."""
+    return rebalancing.plan_all_windows(
+        lambda center: build_scenario_predictions(
+            center, weekday, month, temp, humidity, wind, rain, clouds, selected_team
+        ),
+        TIME_BINS,
     )
 
 # --- Streamlit Interface ---
@@ -153,5 +157,73 @@ Use this to inform **fleet rebalancing**:
 """)
 
 # --- Render Map ---
-deck = build_deck_for_hour(net_flow_hour, weekday, month, temp, humidity, wind, rain, clouds, team)
-st.pydeck_chart(deck)
\ No newline at end of file
+show_moves = st.sidebar.checkbox("Show rebalancing moves", value=True)
+detail = st.sidebar.select_slider(
+    "Map Detail", options=list(hex_pyramid.DETAIL_LEVELS),
+    value=hex_pyramid.DEFAULT_DETAIL
+)
+explain = st.sidebar.checkbox("Explain predictions", value=False)
+plan = plan_rebalancing(weekday, month, temp, humidity, wind, rain, clouds, team)
+window_moves = plan[plan["window"] == net_flow_hour] if show_moves else None
+
+preds = build_scenario_predictions(net_flow_hour, weekday, month, temp, humidity, wind, rain, clouds, team)
+# Tree SHAP is much slower than the prediction, so the page never waits for it:
+# until it is in, the map has no drivers and the panel polls for it.
+contribs = None
+if explain:
+    contribs = submit_scenario_contributions(net_flow_hour, weekday, month, temp, humidity, wind, rain, clouds, team)
+if contribs is not None and scenarios.contributions_ready(contribs):
+    preds = preds.join(scenarios.contribution_frame("demand_model", contribs.result()))
+deck = build_deck_for_hour(preds, window_moves, detail)
+if explain:
+    map_col, explain_col = st.columns([3, 1])
+    map_col.pydeck_chart(deck)
+    with explain_col:
+        st.markdown("#### Why This Net Flow?")
+        if attribution_panel.contribution_features(preds):
+            attribution_panel.show_attributions(preds, "pred_demand", "operational", rank_by_abs=True)
+        else:
+            attribution_panel.await_contributions(contribs)
+else:
+    st.pydeck_chart(deck)
+
+# --- Rebalancing Moves ---
+st.markdown("""
+### Rebalancing Plan
+
+Suggested moves from surplus to shortage hexes, minimizing the total distance
+driven (in H3 grid steps) for each 6-hour window.
+""")
+for tab, center in zip(st.tabs([f"Center hour {c}" for c in TIME_BINS]), TIME_BINS):
+    with tab:
+        moves = plan[plan["window"] == center]
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Moves", f"{len(moves)}")
+        c2.metric("Scooters Moved", f"{int(moves['count'].sum())}")
+        c3.metric("Avg Distance", f"{moves['distance'].mean():.1f} hexes" if len(moves) else "-")
+        st.dataframe(
+            moves[["from_hex", "to_hex", "count", "distance"]].assign(
+                from_hex=h3_index.decode(moves["from_hex"]), to_hex=h3_index.decode(moves["to_hex"])
+            ),
+            hide_index=True,
+        )
+# --- Weather File Scenario ---
+st.markdown("""
+### Weather File Scenario
+
+Upload or paste an hourly weather forecast (up to two weeks) to predict the net
+flow of every hex and 6-hour window for the selected team. The weather is
+averaged over each window, and the per-hex results appear one day at a time.
+""")
+weather_df = weather_input.weather_file_input("operational")
+if weather_df is not None and st.button("Score Weather File", key="operational_score"):
+    chunks = scenarios.stream_hex_weather_predictions(
+        "demand_model", weather_df, "pred_demand", selected_team=team
+    )
+    result = weather_input.show_hex_stream(
+        chunks, "pred_demand", weather_df.index.normalize().nunique(), rank_by_abs=True
+    )
+    st.download_button(
+        "Download Per-Hex Predictions (CSV)", data=result.to_csv(index=False),
+        file_name="weather_scenario_hexes.csv", mime="text/csv"
+    )
@@ -1,13 +1,23 @@
 import streamlit as st
 from keplergl import KeplerGl
 from streamlit_keplergl import keplergl_static
-import pandas as pd
+
+import h3_index
+import trip_store
 
 # --------------------------------------------------------------
-# 1. Load and Prepare Data
+# 1. Load and Prepare Data (filtered in DuckDB, see trip_store)
 # --------------------------------------------------------------
-df = pd.read_csv("data/lime_maphex.csv")
-df = df.drop(columns=["Unnamed: 0", "Unnamed: 0.1"], errors="ignore")
+st.sidebar.header("Flow Filters")
+min_trips = st.sidebar.number_input("Minimum Trips per OD Pair", min_value=0, value=0, step=5)
+hex_subset = st.sidebar.multiselect(
+    "Only Flows From/To Hexes (optional)",
+    options=h3_index.decode(trip_store.od_hex_ids()).tolist()
+)
+df = trip_store.od_flows(h3_index.encode(hex_subset) if hex_subset else None, min_trips)
+
+# Kepler.gl recognizes H3 strings, not the uint64 IDs used in memory
+df = df.assign(start_hex=h3_index.decode(df["start_hex"]), end_hex=h3_index.decode(df["end_hex"]))
 
 # --------------------------------------------------------------
 # 2. Create a Kepler.gl Map and Add Data
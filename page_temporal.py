@@ -1,22 +1,10 @@
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
-import joblib
 
-# --- Load Data ---
-X_forecasting = pd.read_csv("data/data.csv")
-train_pred_df = pd.read_csv("data/train_pred_df.csv")
-
-# --- Load Trained Model ---
-boost_model = joblib.load("models/boost_model.pkl")
-
-# --- Prepare Forecasting Data ---
-X_forecasting['baseline'] = train_pred_df['yhat'].rolling(window=74).mean()
-X_forecasting.dropna(subset=['baseline'], inplace=True)
-X_forecasting.set_index('ds', inplace=True)
-
-X_train = X_forecasting[X_forecasting['y'].notna()].copy()
-y_train = X_train.pop('y')
+import forward_forecast
+import intervals
+import scenarios
+import weather_input
 
 # --- Sidebar Controls ---
 st.sidebar.header("Customize Forecast Scenario")
@@ -31,62 +19,53 @@ custom_snow = st.sidebar.slider("Snowfall (mm/h)", 0.0, 7.0, 0.0, step=1.0)
 custom_wind = st.sidebar.slider("Wind Speed (m/s)", 0.0, 20.0, 2.0, step=0.5)
 custom_humidity = st.sidebar.slider("Humidity (%)", 0, 100, 50, step=1)
 
-# --- Helper to Create Scenario DataFrame ---
-def make_scenario_df(X_train, day_of_week, month, start_hour, temp, rain, snow, wind, humidity):
-    df = pd.DataFrame({'hour': range(24)})
-    df['day_of_week'] = day_of_week
-    df['month'] = month
-    df['temp'] = 15.0
-    df['rain_1h'] = 0.0
-    df['snow_1h'] = 0.0
-    df['wind_speed'] = 2.0
-    df['humidity'] = 50
-
-    # Fill in any missing columns
-    for col in X_train.columns:
-        if col not in df.columns:
-            df[col] = X_train[col].mode()[0]
-
-    # Apply custom values to the 3-hour window
-    mask = (df['hour'] >= start_hour) & (df['hour'] <= start_hour + 2)
-    df.loc[mask, 'temp'] = temp
-    df.loc[mask, 'rain_1h'] = rain
-    df.loc[mask, 'snow_1h'] = snow
-    df.loc[mask, 'wind_speed'] = wind
-    df.loc[mask, 'humidity'] = humidity
-
-    # Set baseline, cap, and floor
-    df['baseline'] = 3000
-    df['cap'] = X_train['cap'].max()
-    df['floor'] = X_train['floor'].min()
-
-    return df[X_train.columns]
+show_interval = st.sidebar.checkbox("Show prediction interval", value=True)
+coverage = st.sidebar.select_slider(
+    "Interval Coverage", options=intervals.COVERAGE_OPTIONS, value=intervals.COVERAGE,
+    format_func=lambda c: f"{c:.0%}", disabled=not show_interval
+)
 
 # --- Prediction Helper ---
-def predict(df):
-    return boost_model.predict(df)
+def predict(day_of_week, month, start_hour, temp, rain, snow, wind, humidity):
+    """Future of 24 hourly predictions, batched with other requests by prediction_service."""
+    return scenarios.submit_temporal_predictions(
+        day_of_week, month, start_hour, temp, rain, snow, wind, humidity
+    )
 
 # --- Plotting ---
 def plot_forecast():
-    custom_df = make_scenario_df(
-        X_train, day_of_week, month, start_hour,
+    hours = list(range(24))
+    # Submit both scenarios before waiting so they share one model call
+    custom_future = predict(
+        day_of_week, month, start_hour,
         custom_temp, custom_rain, custom_snow, custom_wind, custom_humidity
     )
-    baseline_df = make_scenario_df(
-        X_train, day_of_week, month, start_hour,
+    baseline_future = predict(
+        day_of_week, month, start_hour,
         15.0, 0.0, 0.0, 2.0, 50
     )
-
-    custom_preds = predict(custom_df)
-    baseline_preds = predict(baseline_df)
+    custom_preds = custom_future.result()
+    baseline_preds = baseline_future.result()
 
     fig = go.Figure()
+    if show_interval:
+        # Conformal band around the custom scenario, calibrated per hour of day
+        lower, upper = intervals.bounds(custom_preds, hours, coverage)
+        fig.add_trace(go.Scatter(
+            x=hours, y=upper, mode='lines', line=dict(width=0),
+            showlegend=False, hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=hours, y=lower, mode='lines', line=dict(width=0),
+            fill='tonexty', fillcolor='rgba(0, 0, 255, 0.15)',
+            name=f'{coverage:.0%} Interval'
+        ))
     fig.add_trace(go.Scatter(
-        x=custom_df['hour'], y=custom_preds,
+        x=hours, y=custom_preds,
         mode='lines+markers', name='Custom Scenario', line=dict(color='blue')
     ))
     fig.add_trace(go.Scatter(
-        x=baseline_df['hour'], y=baseline_preds,
+        x=hours, y=baseline_preds,
         mode='lines+markers', name='Baseline', line=dict(color='black', dash='dash')
     ))
 
@@ -106,8 +85,96 @@ def plot_forecast():
 
     return fig
 
-# --- Show Plot ---
-st.plotly_chart(plot_forecast())
+def plot_forward_forecast(days):
+    """Recent actuals plus the cached rolling forecast for the next `days` days."""
+    forecaster = forward_forecast.get_forecaster()
+    forecast = forecaster.forecast(days, coverage)
+    actuals = forecaster.recent_actuals(days=2)
+
+    fig = go.Figure()
+    if show_interval:
+        fig.add_trace(go.Scatter(
+            x=forecast['ds'], y=forecast['hi'], mode='lines', line=dict(width=0),
+            showlegend=False, hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=forecast['ds'], y=forecast['lo'], mode='lines', line=dict(width=0),
+            fill='tonexty', fillcolor='rgba(255, 165, 0, 0.2)',
+            name=f'{coverage:.0%} Interval'
+        ))
+    fig.add_trace(go.Scatter(
+        x=actuals.index, y=actuals.values,
+        mode='lines', name='Actual Trips', line=dict(color='black')
+    ))
+    fig.add_trace(go.Scatter(
+        x=forecast['ds'], y=forecast['pred'],
+        mode='lines', name='Forecast', line=dict(color='orange')
+    ))
+    fig.update_layout(
+        title=f"{days}-Day Forecast from {forecaster.origin:%Y-%m-%d %H:%M}",
+        xaxis_title="Time",
+        yaxis_title="Predicted Trip Count"
+    )
+    return fig, forecast
+
+def plot_weather_file(weather_df):
+    """Hourly predictions for an uploaded weather table, scored in one batch."""
+    preds = scenarios.temporal_weather_predictions(weather_df, coverage)
+
+    fig = go.Figure()
+    if show_interval:
+        fig.add_trace(go.Scatter(
+            x=preds['ds'], y=preds['hi'], mode='lines', line=dict(width=0),
+            showlegend=False, hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=preds['ds'], y=preds['lo'], mode='lines', line=dict(width=0),
+            fill='tonexty', fillcolor='rgba(0, 0, 255, 0.15)',
+            name=f'{coverage:.0%} Interval'
+        ))
+    fig.add_trace(go.Scatter(
+        x=preds['ds'], y=preds['pred'],
+        mode='lines+markers', name='Weather File Scenario', line=dict(color='blue')
+    ))
+    fig.update_layout(
+        title="Forecast for the Uploaded Weather",
+        xaxis_title="Time",
+        yaxis_title="Predicted Trip Count"
+    )
+    return fig, preds
+
+# --- Show Plots ---
+tab_scenario, tab_forward, tab_weather = st.tabs(["Scenario Day", "Forward Forecast", "Weather File"])
+
+with tab_scenario:
+    st.plotly_chart(plot_forecast())
+
+with tab_forward:
+    horizon_days = st.select_slider(
+        "Horizon (days)", options=forward_forecast.HORIZON_OPTIONS, value=forward_forecast.HORIZON_OPTIONS[0]
+    )
+    fig_forward, forecast = plot_forward_forecast(horizon_days)
+    st.plotly_chart(fig_forward)
+    st.caption(
+        f"Weather from {forward_forecast.WEATHER_FILE} where available, otherwise the stored "
+        "forecast weather or the monthly climatology. The forecast is shared by all viewers "
+        "and only hours that are new or whose inputs changed are re-predicted."
+    )
+    st.download_button(
+        "Download Forecast (CSV)", data=forecast.to_csv(index=False),
+        file_name="forward_forecast.csv", mime="text/csv"
+    )
+
+with tab_weather:
+    st.markdown("Upload or paste an hourly weather forecast (up to two weeks) to score every hour at once.")
+    weather_df = weather_input.weather_file_input("temporal")
+    if weather_df is not None:
+        fig_weather, weather_preds = plot_weather_file(weather_df)
+        st.plotly_chart(fig_weather)
+        st.download_button(
+            "Download Predictions (CSV)", data=weather_preds.to_csv(index=False),
+            file_name="weather_scenario.csv", mime="text/csv"
+        )
 
 # Optional: Export as HTML
 # st.download_button("Download Plot", data=open("plot.html", "rb"), file_name="forecast_plot.html", mime="text/html")
@@ -0,0 +1,161 @@
+"""
+In-process prediction service shared by all Streamlit sessions.
+
+Every slider change on the scenario decks needs a tiny predict call (one
+row for the hex models, 24 rows for the temporal model). The service runs
+an asyncio loop on a background thread with one batcher per model: requests
+arriving within ESCOOTER_BATCH_MS (default 5 ms) of each other, from any
+session, are concatenated into a single model.predict call and the result
+rows are handed back to each caller.
+
+Batches go through serving.run(), so in the processes serving mode they are
+spread over the worker pool and up to ESCOOTER_WORKERS batches per model run
+at once.
+
+Feature attributions for the hex decks (see explanations.py) are batched
+the same way, on a queue of their own per model.
+"""
+import asyncio
+import atexit
+import os
+import threading
+
+import pandas as pd
+
+import explanations
+import serving
+
+BATCH_WINDOW_MS = float(os.environ.get("ESCOOTER_BATCH_MS", 5))
+MAX_BATCH_ROWS = 4096
+
+
+def predict_rows(model_key, X, contribs=False):
+    """Run one batch; module level so it can be sent to a worker process."""
+    model = serving.model(model_key)
+    if contribs:
+        return explanations.contributions(model, X)
+    return model.predict(X)
+
+
+class PredictionService:
+    def __init__(self, window_ms=BATCH_WINDOW_MS, max_batch_rows=MAX_BATCH_ROWS):
+        self.window = window_ms / 1000
+        self.max_batch_rows = max_batch_rows
+        self.concurrency = serving.WORKERS if serving.MODE == "processes" else 1
+        self.requests = 0
+        self.batches = 0
+        self._queues = {}
+        self._tasks = set()  # the loop only keeps weak references to tasks
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="prediction-service", daemon=True)
+        self._thread.start()
+
+    def submit(self, model_key, X, contribs=False):
+        """
+        Queue `X` for `model_key`; returns a concurrent.futures.Future of its
+        predictions, or of its per-feature contributions with `contribs`.
+        """
+        return asyncio.run_coroutine_threadsafe(self._submit((model_key, contribs), X), self._loop)
+
+    def predict(self, model_key, X):
+        return self.submit(model_key, X).result()
+
+    def close(self):
+        """Cancel the batchers and pending requests, stop the loop and join its thread."""
+        if self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self._cancel_tasks(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch": self.requests / self.batches if self.batches else 0.0,
+        }
+
+    # --- Event Loop Side ---
+    async def _cancel_tasks(self):
+        tasks = [task for task in asyncio.all_tasks(self._loop) if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _spawn(self, coro):
+        task = self._loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _submit(self, key, X):
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = asyncio.Queue()
+            self._spawn(self._batcher(key, queue))
+        result = self._loop.create_future()
+        await queue.put((X, result))
+        return await result
+
+    async def _batcher(self, key, queue):
+        slots = asyncio.Semaphore(self.concurrency)
+        while True:
+            batch = [await queue.get()]
+            rows = len(batch[0][0])
+            deadline = self._loop.time() + self.window
+            while rows < self.max_batch_rows:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                rows += len(item[0])
+
+            # While every slot is busy, new requests keep queueing into the next batch.
+            await slots.acquire()
+            self._spawn(self._run_batch(key, batch, slots))
+
+    async def _run_batch(self, key, batch, slots):
+        model_key, contribs = key
+        try:
+            X = pd.concat([frame for frame, _ in batch], ignore_index=True)
+            preds = await self._loop.run_in_executor(None, serving.run, predict_rows, model_key, X, contribs)
+        except Exception as exc:
+            for _, result in batch:
+                if not result.done():
+                    result.set_exception(exc)
+            return
+        finally:
+            slots.release()
+
+        self.requests += len(batch)
+        self.batches += 1
+        offset = 0
+        for frame, result in batch:
+            if not result.done():
+                result.set_result(preds[offset:offset + len(frame)])
+            offset += len(frame)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = PredictionService()
+            atexit.register(_service.close)
+        return _service
+
+
+def submit(model_key, X, contribs=False):
+    return get_service().submit(model_key, X, contribs)
+
+
+def predict(model_key, X):
+    return get_service().predict(model_key, X)
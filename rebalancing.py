@@ -0,0 +1,103 @@
+"""
+Fleet rebalancing plans for the Operational Demand Deck.
+
+Takes the per-hex net flow predicted by build_scenario_predictions (negative
+= surplus / red, positive = shortage / blue) and solves a min-cost
+transportation problem: move as many surplus scooters as possible into
+shortage hexes while minimizing the total H3 grid distance travelled.
+
+Grid distances come from the H3 local IJ coordinates precomputed by
+h3_index, so the whole distance matrix is one vectorized NumPy expression.
+Each surplus hex is only connected to its nearest shortage hexes
+(MAX_CANDIDATES), which keeps the LP sparse (a few tens of thousands of
+edges for thousands of hexes) for the HiGHS solver behind scipy's linprog.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import linprog
+
+import h3_index
+
+MAX_CANDIDATES = 30
+
+
+# --- Transportation Problem ---
+def plan_moves(preds, value_col="pred_demand", hex_col="hex_id", max_candidates=MAX_CANDIDATES):
+    """
+    Concrete scooter moves for one net-flow prediction. Returns a DataFrame of
+    from_hex, to_hex (uint64 cells), count, distance (grid steps) and the
+    centroids of both hexes for drawing arcs.
+    """
+    columns = ["from_hex", "to_hex", "count", "distance", "from_lat", "from_lng", "to_lat", "to_lng"]
+    values = preds[value_col].to_numpy()
+    counts = np.rint(np.abs(values)).astype(int)
+
+    surplus = np.nonzero((values < 0) & (counts > 0))[0]
+    shortage = np.nonzero((values > 0) & (counts > 0))[0]
+    if len(surplus) == 0 or len(shortage) == 0:
+        return pd.DataFrame(columns=columns)
+
+    hex_ids = preds[hex_col].to_numpy()
+    index = h3_index.get_index(hex_ids)
+    dist = index.grid_distances(surplus, shortage)
+
+    # Sparse candidate edges: each surplus hex to its nearest shortage hexes
+    k = min(max_candidates, len(shortage))
+    nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+    src = np.repeat(np.arange(len(surplus)), k)
+    dst = nearest.ravel()
+    cost = dist[src, dst]
+    finite = np.isfinite(cost)
+    src, dst, cost = src[finite], dst[finite], cost[finite]
+    n_edges = len(cost)
+    if n_edges == 0:
+        return pd.DataFrame(columns=columns)
+
+    # Each edge appears once in its supply row and once in its demand row
+    edges = np.arange(n_edges)
+    A_ub = sparse.vstack([
+        sparse.csr_matrix((np.ones(n_edges), (src, edges)), shape=(len(surplus), n_edges)),
+        sparse.csr_matrix((np.ones(n_edges), (dst, edges)), shape=(len(shortage), n_edges)),
+    ]).tocsr()
+    b_ub = np.concatenate([counts[surplus], counts[shortage]])
+
+    # Subtracting a per-scooter reward maximizes the number of scooters moved
+    # first, and only then minimizes distance. One more scooter moved must
+    # outweigh any difference in total distance, which is below the longest
+    # edge times the most scooters that can move; a smaller reward (e.g. the
+    # longest edge + 1) can prefer one short move over two longer ones once
+    # the candidate edges are pruned.
+    reward = cost.max() * min(counts[surplus].sum(), counts[shortage].sum()) + 1
+    result = linprog(cost - reward, A_ub=A_ub, b_ub=b_ub, bounds=(0, None), method="highs")
+    if not result.success:
+        raise RuntimeError(f"Rebalancing LP failed: {result.message}")
+
+    # Transportation LPs with integer capacities have integral optima
+    moved = np.rint(result.x).astype(int)
+    keep = moved > 0
+    from_idx, to_idx = surplus[src[keep]], shortage[dst[keep]]
+    centroids = index.centroids
+    moves = pd.DataFrame({
+        "from_hex": hex_ids[from_idx],
+        "to_hex": hex_ids[to_idx],
+        "count": moved[keep],
+        "distance": cost[keep].astype(int),
+        "from_lat": centroids[from_idx, 0],
+        "from_lng": centroids[from_idx, 1],
+        "to_lat": centroids[to_idx, 0],
+        "to_lng": centroids[to_idx, 1],
+    })
+    return moves.sort_values(["count", "distance"], ascending=[False, True], ignore_index=True)
+
+
+def plan_all_windows(predict_window, time_bins, **kwargs):
+    """
+    Moves for every 6-hour window. `predict_window(center_hour)` returns the
+    melted per-hex predictions for that window.
+    """
+    plans = [
+        plan_moves(predict_window(center), **kwargs).assign(window=center)
+        for center in time_bins
+    ]
+    return pd.concat(plans, ignore_index=True)
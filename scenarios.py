@@ -0,0 +1,302 @@
+"""
+Scenario builders behind the Temporal, Consumer and Operational decks.
+
+These are plain module-level functions (not page code) so they can run
+outside Streamlit. Feature frames are built from the feature-default
+profiles stored with each model (serving.metadata()), and predictions go
+through prediction_service so concurrent sessions share batched model calls.
+The Consumer scenarios also return conformal interval bounds (see
+intervals.py), calibrated per hex on xgb_model's own residuals. The
+Operational net flow has none: neither calibration covers demand_model's
+signed flows.
+
+The tree SHAP contribution of each feature to each hex (see
+explanations.py) is requested separately, as a Future, once a scenario's
+predictions are back, so the decks never wait for it. The Future is cached
+per scenario row until it fails.
+"""
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import explanations
+import intervals
+import prediction_service
+import serving
+
+TEAM_COLUMNS = ["Team_ChicagoBulls", "Team_FireFC", "Team_StarsFC"]
+NET_FLOW_WINDOW_HOURS = 6
+CONTRIB_PREFIX = "contrib_"
+ATTRIBUTION_CACHE_SIZE = 256
+
+
+def melt_predictions(preds, hex_ids, value_name):
+    """Long hex_id / value frame for a rows x hexes prediction array (same order as DataFrame.melt)."""
+    preds = np.asarray(preds).reshape(-1, len(hex_ids))
+    return pd.DataFrame({
+        "hex_id": np.repeat(hex_ids, len(preds)),
+        value_name: preds.ravel(order="F"),
+    })
+
+
+# --- Feature Profiles (from the model metadata, see model_bundle.py) ---
+@lru_cache(maxsize=None)
+def hex_profile():
+    """Most frequent value of each X_hex feature, plus the monthly baseline means."""
+    profile = serving.metadata("xgb_model")["profile"]
+    baseline_by_month = {int(month): value for month, value in profile["baseline_by_month"].items()}
+    return profile["defaults"], baseline_by_month, profile["baseline_mean"]
+
+
+@lru_cache(maxsize=None)
+def demand_profile():
+    """Median of each X_demand feature."""
+    return serving.metadata("demand_model")["profile"]["defaults"]
+
+
+@lru_cache(maxsize=None)
+def temporal_profile():
+    """Most frequent value of each X_train feature, plus cap/floor bounds."""
+    profile = serving.metadata("boost_model")["profile"]
+    return profile["defaults"], profile["cap"], profile["floor"]
+
+
+# --- Hex Scenario Attributions ---
+_contribution_futures = OrderedDict()  # (model_key, row) -> Future, least recently used first
+_contribution_lock = threading.Lock()
+
+
+def _forget_failed(key, future):
+    if not contributions_ready(future):
+        with _contribution_lock:
+            if _contribution_futures.get(key) is future:
+                del _contribution_futures[key]
+
+
+def submit_contributions(model_key, X):
+    """
+    Future of the tree SHAP values of a one-row scenario `X` (see
+    contribution_frame); submitted once per distinct row and model,
+    process-wide, and shared by every session that asks again. A failed
+    Future is dropped, so the next request submits the row afresh.
+    """
+    key = (model_key, tuple(X.iloc[0].items()))
+    with _contribution_lock:
+        future = _contribution_futures.get(key)
+        if future is not None:
+            _contribution_futures.move_to_end(key)
+            return future
+        future = _contribution_futures[key] = prediction_service.submit(model_key, X, contribs=True)
+        while len(_contribution_futures) > ATTRIBUTION_CACHE_SIZE:
+            _contribution_futures.popitem(last=False)
+    future.add_done_callback(lambda done: _forget_failed(key, done))
+    return future
+
+
+def contributions_ready(future):
+    """True once a submit_contributions Future has succeeded."""
+    return future.done() and not future.cancelled() and future.exception() is None
+
+
+def contribution_columns(features):
+    return [CONTRIB_PREFIX + col for col in list(features) + [explanations.BIAS]]
+
+
+def contribution_frame(model_key, contribs):
+    """
+    contrib_<feature> and contrib_bias columns for the result of
+    submit_contributions, one row per hex in the order of the scenario
+    predictions, ready to join onto them.
+    """
+    columns = contribution_columns(serving.metadata(model_key)["features"])
+    return pd.DataFrame(np.asarray(contribs)[0], columns=columns)
+
+
+# --- Consumer Demand Deck ---
+def customer_features(hour, day_of_week, month, temp, humidity, wind, rain, clouds, selected_team=None):
+    """One xgb_model feature row: the most frequent values with the scenario's features overridden."""
+    most_frequent, baseline_by_month, baseline_mean = hex_profile()
+    model_features = list(most_frequent)
+    df = pd.DataFrame([most_frequent])
+
+    # Override weather and time features
+    df["hour"] = hour
+    df["day_of_week"] = day_of_week
+    df["month"] = month
+    df["temp"] = temp
+    df["humidity"] = humidity
+    df["wind_speed"] = wind
+    df["rain_1h"] = rain
+    df["clouds_all"] = clouds
+
+    # Baseline is the mean of the selected month, falling back to the overall mean
+    df["baseline"] = baseline_by_month.get(month, baseline_mean)
+
+    # Reset all team flags, then set the selected one
+    df[TEAM_COLUMNS] = 0
+    if selected_team:
+        df[f"Team_{selected_team}"] = 1
+    return df[model_features]
+
+
+def customer_predictions(hour, day_of_week, month, temp, humidity, wind, rain, clouds, selected_team=None,
+                         coverage=intervals.COVERAGE):
+    """Melted predictions for one scenario: hex_id, pred_trip, pred_trip_lo, pred_trip_hi."""
+    X = customer_features(hour, day_of_week, month, temp, humidity, wind, rain, clouds, selected_team)
+    preds = prediction_service.predict("xgb_model", X)
+    preds_df = melt_predictions(preds, serving.target_columns("xgb_model"), "pred_trip")
+    preds_df["pred_trip_lo"], preds_df["pred_trip_hi"] = intervals.hex_bounds(
+        preds_df["pred_trip"], preds_df["hex_id"], hour, coverage
+    )
+    return preds_df
+
+
+# --- Operational Demand Deck ---
+def operational_features(net_flow_hour, weekday, month, temp, humidity, wind, rain, clouds, selected_team):
+    """One demand_model feature row: the medians with the scenario's features overridden."""
+    base_values = demand_profile()
+    model_features = list(base_values)
+    df = pd.DataFrame([base_values])
+
+    # Override relevant features
+    df["hour"] = net_flow_hour
+    df["day_of_week"] = weekday
+    df["month"] = month
+    df["temp"] = temp
+    df["humidity"] = humidity
+    df["wind_speed"] = wind
+    df["rain_1h"] = rain
+    df["clouds_all"] = clouds
+    df["baseline"] = 1000
+
+    # Reset team flags, then set the selected one
+    df[TEAM_COLUMNS] = 0
+    if selected_team in ("ChicagoBulls", "FireFC", "StarsFC"):
+        df[f"Team_{selected_team}"] = 1
+    return df[model_features]
+
+
+def operational_predictions(net_flow_hour, weekday, month, temp, humidity, wind, rain, clouds, selected_team):
+    """Melted net flow per hex: hex_id, pred_demand."""
+    X = operational_features(net_flow_hour, weekday, month, temp, humidity, wind, rain, clouds, selected_team)
+    preds = prediction_service.predict("demand_model", X)
+    return melt_predictions(preds, serving.target_columns("demand_model"), "pred_demand")
+
+
+# --- Temporal Scenario Deck ---
+def make_temporal_scenario_df(day_of_week, month, start_hour, temp, rain, snow, wind, humidity):
+    most_frequent, cap, floor = temporal_profile()
+    df = pd.DataFrame({'hour': range(24)})
+    df['day_of_week'] = day_of_week
+    df['month'] = month
+    df['temp'] = 15.0
+    df['rain_1h'] = 0.0
+    df['snow_1h'] = 0.0
+    df['wind_speed'] = 2.0
+    df['humidity'] = 50
+
+    # Fill in any missing columns
+    for col, value in most_frequent.items():
+        if col not in df.columns:
+            df[col] = value
+
+    # Apply custom values to the 3-hour window
+    mask = (df['hour'] >= start_hour) & (df['hour'] <= start_hour + 2)
+    df.loc[mask, 'temp'] = temp
+    df.loc[mask, 'rain_1h'] = rain
+    df.loc[mask, 'snow_1h'] = snow
+    df.loc[mask, 'wind_speed'] = wind
+    df.loc[mask, 'humidity'] = humidity
+
+    # Set baseline, cap, and floor
+    df['baseline'] = 3000
+    df['cap'] = cap
+    df['floor'] = floor
+
+    return df[list(most_frequent)]
+
+
+def submit_temporal_predictions(day_of_week, month, start_hour, temp, rain, snow, wind, humidity):
+    """Future of the hourly predictions (24 values) for one synthetic scenario day."""
+    df = make_temporal_scenario_df(day_of_week, month, start_hour, temp, rain, snow, wind, humidity)
+    return prediction_service.submit("boost_model", df)
+
+
+# --- Bulk Weather Scenarios ---
+def weather_feature_rows(weather_df, base_values):
+    """
+    One feature row per hour of a parsed weather table (see weather.parse):
+    `base_values` overridden by each hour's calendar and weather.
+    """
+    ds = weather_df.index
+    df = pd.DataFrame({col: np.repeat(value, len(ds)) for col, value in base_values.items()}, index=ds)
+    df["hour"] = ds.hour
+    df["day_of_week"] = ds.dayofweek
+    df["month"] = ds.month
+    for col in weather_df.columns:
+        if col in df.columns:
+            df[col] = weather_df[col].fillna(base_values[col]).to_numpy()
+    return df[list(base_values)]
+
+
+def temporal_weather_predictions(weather_df, coverage=intervals.COVERAGE):
+    """Hourly city-wide predictions for a weather table, scored in one batch: ds, pred, lo, hi."""
+    most_frequent, cap, floor = temporal_profile()
+    df = weather_feature_rows(weather_df, dict(most_frequent, baseline=3000, cap=cap, floor=floor))
+    preds = prediction_service.predict("boost_model", df)
+    lo, hi = intervals.bounds(preds, df["hour"], coverage)
+    return pd.DataFrame({"ds": weather_df.index, "pred": preds, "lo": lo, "hi": hi})
+
+
+def _hex_weather_rows(model_key, weather_df, selected_team):
+    """
+    Feature rows for a hex model: one per hour for xgb_model, one per
+    6-hour net flow window for demand_model (weather averaged over the
+    window, hour set to the window centre as on the Operational deck).
+    """
+    if model_key == "xgb_model":
+        most_frequent, baseline_by_month, baseline_mean = hex_profile()
+        df = weather_feature_rows(weather_df, most_frequent)
+        df["baseline"] = df["month"].map(baseline_by_month).fillna(baseline_mean)
+    else:
+        windows = weather_df.groupby(weather_df.index.floor(f"{NET_FLOW_WINDOW_HOURS}h")).mean()
+        df = weather_feature_rows(windows, demand_profile())
+        df["hour"] = windows.index.hour + (NET_FLOW_WINDOW_HOURS - 1) / 2
+        df["baseline"] = 1000
+    df[TEAM_COLUMNS] = 0
+    if selected_team in ("ChicagoBulls", "FireFC", "StarsFC"):
+        df[f"Team_{selected_team}"] = 1
+    return df
+
+
+def stream_hex_weather_predictions(model_key, weather_df, value_name, selected_team=None, coverage=None):
+    """
+    Per-hex predictions for every hour (xgb_model) or 6-hour window
+    (demand_model, ds = window start) of a weather table, yielded one
+    calendar day at a time as long frames of ds, hex_id, value (and
+    value_lo, value_hi with a `coverage`; xgb_model only).
+
+    Each day is submitted once the previous day's predictions are back, so
+    prediction_service never merges the whole file into one batch: the first
+    day arrives after one small model call, and the next day is scored while
+    the caller renders the current one.
+    """
+    df = _hex_weather_rows(model_key, weather_df, selected_team)
+    hex_ids = serving.target_columns(model_key)
+    days = [chunk for _, chunk in df.groupby(df.index.normalize())]
+    future = prediction_service.submit(model_key, days[0]) if days else None
+
+    for n, chunk in enumerate(days):
+        preds = np.asarray(future.result()).reshape(len(chunk), -1)
+        if n + 1 < len(days):
+            future = prediction_service.submit(model_key, days[n + 1])
+        long = melt_predictions(preds, hex_ids, value_name)
+        long.insert(0, "ds", np.tile(chunk.index.to_numpy(), len(hex_ids)))
+        if coverage is not None:
+            long[f"{value_name}_lo"], long[f"{value_name}_hi"] = intervals.hex_bounds(
+                long[value_name], long["hex_id"], np.tile(chunk["hour"].to_numpy(), len(hex_ids)), coverage
+            )
+        yield long
@@ -0,0 +1,137 @@
+"""
+Serving mode for the scenario decks.
+
+Streamlit runs every session on a thread of one Python process, so model
+predictions and pandas aggregations from concurrent users contend for the
+GIL. With ESCOOTER_SERVING=processes, scenario work is sent to a pool of
+ESCOOTER_WORKERS worker processes (default: one per core) instead:
+
+- each model is pickled once in the parent and the bytes are handed to
+  every worker at start-up; each worker deserializes them into its own
+  private copy, so memory grows with the number of workers
+- the models' bundle metadata (features, target hex IDs, feature
+  defaults) is small and passed to workers as-is; scenario feature rows
+  are built from it, so no training frame is needed in the workers
+
+In the default "threads" mode, run() calls the function inline and
+model() / metadata() serve the regular process-wide caches, so scenario
+code is written once and works in both modes.
+"""
+import atexit
+import os
+import pickle
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+import datasets
+
+MODE = os.environ.get("ESCOOTER_SERVING", "threads")
+WORKERS = int(os.environ.get("ESCOOTER_WORKERS", os.cpu_count() or 1))
+
+SERVED_MODELS = list(datasets.MODEL_FILES)
+STARTUP_TIMEOUT = 300  # seconds for every worker to start and load the models
+
+
+# --- Worker State ---
+_models = {}
+_metadata = {}
+_startup_barrier = None
+
+
+def _init_worker(model_payloads, model_metadata, startup_barrier):
+    global _startup_barrier
+    for key, payload in model_payloads.items():
+        _models[key] = pickle.loads(payload)
+    _metadata.update(model_metadata)
+    _startup_barrier = startup_barrier
+
+
+def _await_pool():
+    """Warmup task: holds its worker until every worker has started."""
+    _startup_barrier.wait(STARTUP_TIMEOUT)
+    return os.getpid()
+
+
+def model(key):
+    if key in _models:
+        return _models[key]
+    return datasets.load_model(key)
+
+
+def metadata(key):
+    """Bundle metadata of model `key` (see model_bundle)."""
+    if key in _metadata:
+        return _metadata[key]
+    return datasets.model_metadata(key)
+
+
+def target_columns(key):
+    """uint64 target hex IDs of model `key`, in output order."""
+    return np.array(metadata(key)["targets"], dtype=np.uint64)
+
+
+# --- Pool ---
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _start_pool():
+    model_payloads = {key: pickle.dumps(datasets.load_model(key)) for key in SERVED_MODELS}
+    model_metadata = {key: datasets.model_metadata(key) for key in SERVED_MODELS}
+
+    atexit.register(shutdown)
+    # spawn, not fork: Streamlit's server threads must not be forked mid-flight.
+    context = get_context("spawn")
+    pool = ProcessPoolExecutor(
+        max_workers=WORKERS,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(model_payloads, model_metadata, context.Barrier(WORKERS)),
+    )
+
+    # Streamlit executes the page as __main__, and spawn would re-run that
+    # script in every worker. Start all workers now, behind a bare __main__:
+    # each warmup task blocks its worker at the barrier, so the pool has to
+    # spawn a new worker for every one of them.
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        warmup = [pool.submit(_await_pool) for _ in range(WORKERS)]
+    finally:
+        sys.modules["__main__"] = main
+    pids = {future.result() for future in warmup}
+    if len(pids) != WORKERS:
+        pool.shutdown(cancel_futures=True)
+        raise RuntimeError(f"Serving pool started {len(pids)} of {WORKERS} workers")
+    return pool
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _start_pool()
+        return _pool
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def run(fn, *args, **kwargs):
+    """
+    Run a module-level scenario function, in a worker process when the
+    processes serving mode is on and inline otherwise.
+    """
+    if MODE != "processes":
+        return fn(*args, **kwargs)
+    return get_pool().submit(fn, *args, **kwargs).result()
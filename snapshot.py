@@ -0,0 +1,366 @@
+"""
+Static snapshot of the dashboard's standard views, for offline distribution.
+
+Renders, without Streamlit:
+
+- the Monthly Hex Map of every month in hex_toolpin
+- the Consumer deck's standard scenario (the deck's default weather, Monday
+  in January) at CUSTOMER_HOURS, with interval bounds, and the Operational
+  deck's net flow at each 6-hour window
+- the forecast charts: actual vs forecast trips, the forward forecast and
+  the Temporal deck's default scenario day
+
+into a directory that any plain file server (or a phone's cache) can serve:
+
+    index.html      self-contained viewer (canvas maps, SVG charts, no libraries)
+    manifest.json   views, binary layouts and the downsampled chart series
+    maps/*.bin      one file per map, little-endian: uint64 H3 IDs[n], then
+                    float32[n] per value column, then float32 [lng, lat]
+                    rings[n][vertices] (short rings repeat their last vertex)
+
+Chart series are cut to at most MAX_CHART_POINTS points with
+largest-triangle-three-buckets, which keeps peaks and dips.
+
+Usage:
+    python snapshot.py              # writes ./snapshot
+    python snapshot.py out_dir
+"""
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import datasets
+import forward_forecast
+import hex_pyramid
+import intervals
+import scenarios
+import serving
+
+MAX_CHART_POINTS = 400
+
+# Slider defaults of the hex decks
+STANDARD_WEATHER = {"temp": 15.0, "humidity": 70, "wind": 5.0, "rain": 0.0, "clouds": 50}
+STANDARD_DAY = {"day_of_week": 0, "month": 1}
+CUSTOMER_HOURS = [8, 12, 17, 22]
+OPERATIONAL_WINDOWS = [2.5, 8.5, 14.5, 20.5]
+
+# Slider defaults of the Temporal deck
+TEMPORAL_SCENARIO = {
+    "day_of_week": 1, "month": 8, "start_hour": 10,
+    "temp": 15.0, "rain": 0.0, "snow": 0.0, "wind": 2.0, "humidity": 50,
+}
+
+
+# --- Binary Maps ---
+def write_map(out_dir, name, title, group, index, hex_ids, values, palette="sequential"):
+    """Write one map's binary file; returns its manifest entry."""
+    hex_ids = np.asarray(hex_ids, dtype=np.uint64)
+    rings = [index.boundaries[row] for row in index.positions(hex_ids)]
+    vertices = max((len(ring) for ring in rings), default=0)
+    coords = np.array([ring + ring[-1:] * (vertices - len(ring)) for ring in rings], dtype="<f4")
+
+    path = f"maps/{name}.bin"
+    with open(os.path.join(out_dir, path), "wb") as f:
+        f.write(hex_ids.astype("<u8").tobytes())
+        for column in values.values():
+            f.write(np.asarray(column, dtype="<f4").tobytes())
+        f.write(coords.tobytes())
+
+    return {
+        "name": name,
+        "title": title,
+        "group": group,
+        "file": path,
+        "count": len(hex_ids),
+        "vertices": vertices,
+        "values": list(values),
+        "palette": palette,
+    }
+
+
+def monthly_maps(out_dir):
+    hex_data = datasets.load_hex_toolpin()
+    pyramid = hex_pyramid.get_pyramid(hex_data["hex_id"].unique())
+    entries = []
+    for ym, df_month in hex_data.groupby("year_month"):
+        trips = df_month.groupby("hex_id")["trip_count"].sum()
+        trips = trips[trips > 0]
+        entries.append(write_map(
+            out_dir, f"month_{ym:%Y_%m}", f"Trips in {ym:%B %Y}", "Monthly Hex Map",
+            pyramid.base, trips.index, {"trip_count": trips.to_numpy()},
+        ))
+    return entries
+
+
+def scenario_maps(out_dir):
+    weather = list(STANDARD_WEATHER.values())
+    index = hex_pyramid.get_pyramid(serving.target_columns("xgb_model")).base
+    entries = []
+    for hour in CUSTOMER_HOURS:
+        preds = scenarios.customer_predictions(hour, *STANDARD_DAY.values(), *weather)
+        entries.append(write_map(
+            out_dir, f"customer_{hour:02d}", f"Predicted trips at {hour:02d}:00", "Consumer Demand Deck",
+            index, preds["hex_id"], {col: preds[col] for col in ["pred_trip", "pred_trip_lo", "pred_trip_hi"]},
+        ))
+
+    index = hex_pyramid.get_pyramid(serving.target_columns("demand_model")).base
+    for center in OPERATIONAL_WINDOWS:
+        preds = scenarios.operational_predictions(center, *STANDARD_DAY.values(), *weather, "No Team")
+        entries.append(write_map(
+            out_dir, f"operational_{int(center):02d}", f"Net flow, window centred on {center}h",
+            "Operational Demand Deck", index, preds["hex_id"],
+            {"pred_demand": preds["pred_demand"]},
+            palette="diverging",
+        ))
+    return entries
+
+
+# --- Downsampled Charts ---
+def downsample(x, y, max_points=MAX_CHART_POINTS):
+    """Positions of the points largest-triangle-three-buckets keeps (first and last always)."""
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    keep = [0]
+    for bucket in range(max_points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_x, next_y = x[stop:edges[bucket + 2]].mean(), y[stop:edges[bucket + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        prev_x, prev_y = x[keep[-1]], y[keep[-1]]
+        area = np.abs((prev_x - next_x) * (y[start:stop] - prev_y) - (prev_x - x[start:stop]) * (next_y - prev_y))
+        keep.append(start + int(np.argmax(area)))
+    keep.append(n - 1)
+    return np.array(keep)
+
+
+def series(name, index, values, style="solid"):
+    """One chart line, without NaNs, downsampled; time x values are epoch seconds."""
+    values = pd.Series(np.asarray(values, dtype=float), index=index).dropna()
+    if isinstance(values.index, pd.DatetimeIndex):
+        x = values.index.to_numpy("datetime64[s]").astype(np.int64)
+    else:
+        x = values.index.to_numpy(dtype=float)
+    y = values.to_numpy()
+    keep = downsample(x.astype(float), y)
+    return {"name": name, "style": style, "x": x[keep].tolist(), "y": np.round(y[keep], 1).tolist()}
+
+
+def charts():
+    X_forecasting = datasets.load_forecasting()
+    history = {
+        "title": "Actual vs Forecasted Trips",
+        "x_type": "time",
+        "series": [
+            series("Actual Trips", X_forecasting.index, X_forecasting["y"]),
+            series("Forecasted Trips", X_forecasting.index, X_forecasting["preds"], "dashed"),
+        ],
+    }
+
+    forecaster = forward_forecast.get_forecaster()
+    forward = forecaster.forecast(forward_forecast.MAX_HORIZON_DAYS).set_index("ds")
+    actuals = forecaster.recent_actuals()
+    upcoming = {
+        "title": f"Forward Forecast ({forward_forecast.MAX_HORIZON_DAYS} days, {intervals.COVERAGE:.0%} interval)",
+        "x_type": "time",
+        "series": [
+            series("Recent Actuals", actuals.index, actuals),
+            series("Forecast", forward.index, forward["pred"], "dashed"),
+            series("Lower Bound", forward.index, forward["lo"], "dotted"),
+            series("Upper Bound", forward.index, forward["hi"], "dotted"),
+        ],
+    }
+
+    day = scenarios.submit_temporal_predictions(*TEMPORAL_SCENARIO.values()).result()
+    hours = pd.Index(range(24), name="hour")
+    lo, hi = intervals.bounds(day, hours)
+    scenario_day = {
+        "title": "Temporal Scenario Day (deck defaults)",
+        "x_type": "hour",
+        "series": [
+            series("Predicted Trips", hours, day),
+            series("Lower Bound", hours, lo, "dotted"),
+            series("Upper Bound", hours, hi, "dotted"),
+        ],
+    }
+    return [history, upcoming, scenario_day]
+
+
+# --- Snapshot ---
+def export(out_dir="snapshot"):
+    """Write the snapshot; returns the manifest."""
+    os.makedirs(os.path.join(out_dir, "maps"), exist_ok=True)
+    manifest = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "coverage": intervals.COVERAGE,
+        "maps": monthly_maps(out_dir) + scenario_maps(out_dir),
+        "charts": charts(),
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(INDEX_HTML)
+    return manifest
+
+
+INDEX_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>E-Scooter Dashboard Snapshot</title>
+<style>
+body { font-family: sans-serif; margin: 0 auto; max-width: 960px; padding: 8px; color: #222; }
+select { font-size: 1rem; width: 100%; margin: 4px 0; }
+canvas { width: 100%; height: 60vh; border: 1px solid #ddd; touch-action: none; }
+#info { min-height: 2.6em; font-size: 0.9rem; white-space: pre-line; }
+svg { width: 100%; height: 240px; border: 1px solid #ddd; margin-bottom: 4px; }
+.legend span { margin-right: 12px; font-size: 0.85rem; }
+small { color: #777; }
+</style>
+</head>
+<body>
+<h2>E-Scooter Dashboard Snapshot</h2>
+<small id="created"></small>
+<h3>Maps</h3>
+<select id="view"></select>
+<canvas id="map"></canvas>
+<div id="info">Tap a hex for details.</div>
+<h3>Forecasts</h3>
+<div id="charts"></div>
+<script>
+const COLORS = ["#1f77b4", "#ff7f0e", "#888888", "#888888"];
+let current = null;
+
+function color(value, entry, min, max) {
+  if (entry.palette === "diverging") {
+    const ratio = Math.min(Math.abs(value) / 6, 1);
+    const target = value < 0 ? [255, 0, 0] : [0, 0, 255];
+    return `rgb(${[0, 255, 0].map((c, i) => Math.round(c + ratio * (target[i] - c))).join(",")})`;
+  }
+  const ratio = max === min ? 0.5 : (value - min) / (max - min);
+  return `rgb(${Math.round(255 * ratio)},${Math.round(255 * (1 - ratio))},0)`;
+}
+
+async function loadMap(entry) {
+  const buffer = await (await fetch(entry.file)).arrayBuffer();
+  const n = entry.count;
+  const ids = new BigUint64Array(buffer, 0, n);
+  let offset = 8 * n;
+  const values = {};
+  for (const name of entry.values) {
+    values[name] = new Float32Array(buffer, offset, n);
+    offset += 4 * n;
+  }
+  return { entry, ids, values, rings: new Float32Array(buffer, offset, n * entry.vertices * 2) };
+}
+
+function project(map, canvas) {
+  const { rings } = map;
+  let x0 = Infinity, x1 = -Infinity, y0 = Infinity, y1 = -Infinity;
+  for (let i = 0; i < rings.length; i += 2) {
+    x0 = Math.min(x0, rings[i]); x1 = Math.max(x1, rings[i]);
+    y0 = Math.min(y0, rings[i + 1]); y1 = Math.max(y1, rings[i + 1]);
+  }
+  const kx = Math.cos(((y0 + y1) / 2) * Math.PI / 180);
+  const scale = Math.min(canvas.width / ((x1 - x0) * kx || 1), canvas.height / ((y1 - y0) || 1)) * 0.95;
+  const dx = (canvas.width - (x1 - x0) * kx * scale) / 2, dy = (canvas.height - (y1 - y0) * scale) / 2;
+  return (lng, lat) => [dx + (lng - x0) * kx * scale, canvas.height - dy - (lat - y0) * scale];
+}
+
+function draw(map) {
+  const canvas = document.getElementById("map");
+  canvas.width = canvas.clientWidth * devicePixelRatio;
+  canvas.height = canvas.clientHeight * devicePixelRatio;
+  const ctx = canvas.getContext("2d");
+  const { entry, rings } = map;
+  const main = map.values[entry.values[0]];
+  const min = Math.min(...main), max = Math.max(...main);
+  map.xy = project(map, canvas);
+  map.paths = [];
+  for (let h = 0; h < entry.count; h++) {
+    const path = new Path2D();
+    for (let v = 0; v < entry.vertices; v++) {
+      const k = (h * entry.vertices + v) * 2;
+      const [x, y] = map.xy(rings[k], rings[k + 1]);
+      v ? path.lineTo(x, y) : path.moveTo(x, y);
+    }
+    path.closePath();
+    ctx.fillStyle = color(main[h], entry, min, max);
+    ctx.fill(path);
+    ctx.strokeStyle = "#fff";
+    ctx.stroke(path);
+    map.paths.push(path);
+  }
+}
+
+function pick(event) {
+  if (!current) return;
+  const canvas = document.getElementById("map");
+  const rect = canvas.getBoundingClientRect();
+  const x = (event.clientX - rect.left) * devicePixelRatio, y = (event.clientY - rect.top) * devicePixelRatio;
+  const ctx = canvas.getContext("2d");
+  const h = current.paths.findIndex(path => ctx.isPointInPath(path, x, y));
+  if (h < 0) return;
+  const lines = [`Hex ${current.ids[h].toString(16)}`];
+  for (const name of current.entry.values) lines.push(`${name}: ${current.values[name][h].toFixed(1)}`);
+  document.getElementById("info").textContent = lines.join("\\n");
+}
+
+function chart(spec) {
+  const W = 900, H = 240, P = 36;
+  const all = spec.series.flatMap(s => s.x.map((x, i) => [x, s.y[i]]));
+  const xs = all.map(p => p[0]), ys = all.map(p => p[1]);
+  const x0 = Math.min(...xs), x1 = Math.max(...xs), y0 = Math.min(...ys), y1 = Math.max(...ys);
+  const sx = x => P + (x - x0) / ((x1 - x0) || 1) * (W - 2 * P);
+  const sy = y => H - P + (y0 - y) / ((y1 - y0) || 1) * (H - 2 * P);
+  const label = x => spec.x_type === "time" ? new Date(x * 1000).toISOString().slice(0, 10) : `${x}:00`;
+  const dash = { solid: "", dashed: "6 4", dotted: "2 3" };
+  let svg = `<svg viewBox="0 0 ${W} ${H}" preserveAspectRatio="none">`;
+  spec.series.forEach((s, n) => {
+    const points = s.x.map((x, i) => `${sx(x).toFixed(1)},${sy(s.y[i]).toFixed(1)}`).join(" ");
+    svg += `<polyline fill="none" stroke="${COLORS[n % COLORS.length]}" stroke-dasharray="${dash[s.style]}" points="${points}"/>`;
+  });
+  svg += `<text x="${P}" y="${H - 8}" font-size="12">${label(x0)}</text>`;
+  svg += `<text x="${W - P}" y="${H - 8}" font-size="12" text-anchor="end">${label(x1)}</text>`;
+  svg += `<text x="4" y="${P}" font-size="12">${y1.toFixed(0)}</text><text x="4" y="${H - P}" font-size="12">${y0.toFixed(0)}</text>`;
+  const legend = spec.series.map((s, n) => `<span style="color:${COLORS[n % COLORS.length]}">&#9473; ${s.name}</span>`).join("");
+  return `<h4>${spec.title}</h4>${svg}</svg><div class="legend">${legend}</div>`;
+}
+
+async function main() {
+  const manifest = await (await fetch("manifest.json")).json();
+  document.getElementById("created").textContent = `Snapshot of ${manifest.created}`;
+  const select = document.getElementById("view");
+  for (const [n, entry] of manifest.maps.entries()) {
+    select.add(new Option(`${entry.group}: ${entry.title}`, n));
+  }
+  const show = async () => {
+    current = await loadMap(manifest.maps[select.value]);
+    draw(current);
+    document.getElementById("info").textContent = "Tap a hex for details.";
+  };
+  select.onchange = show;
+  document.getElementById("map").addEventListener("pointerdown", pick);
+  addEventListener("resize", () => current && draw(current));
+  document.getElementById("charts").innerHTML = manifest.charts.map(chart).join("");
+  if (manifest.maps.length) await show();
+}
+main();
+</script>
+</body>
+</html>
+"""
+
+
+if __name__ == "__main__":
+    out_dir = sys.argv[1] if len(sys.argv) > 1 else "snapshot"
+    manifest = export(out_dir)
+    size = sum(os.path.getsize(os.path.join(out_dir, entry["file"])) for entry in manifest["maps"])
+    print(f"{len(manifest['maps'])} maps ({size / 1024:.0f} KB), {len(manifest['charts'])} charts -> {out_dir}")
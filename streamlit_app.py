@@ -1,7 +1,22 @@
+import os
+import sys
+
 import streamlit as st
 
+# --- APP-WIDE SETUP ---
+# Pandas copy-on-write for the whole app: pages get shallow views of the
+# shared dataset cache (see dataset_cache.py), and a page that modifies one
+# then copies just the touched columns instead of corrupting the cache. Set
+# through the environment so this file still doesn't import pandas.
+os.environ.setdefault("PANDAS_COPY_ON_WRITE", "1")
+if "pandas" in sys.modules:
+    sys.modules["pandas"].set_option("mode.copy_on_write", True)
+
 
 # --- PAGE SETUP ---
+# Pages are registered by file path, so each deck's libraries, models and
+# datasets are only imported on first navigation. Keep this file (and the
+# landing page) free of anything heavier than streamlit; see import_report.py.
 about_page = st.Page(
     "e-scooter.py",
     title="E-scooter",
@@ -45,4 +60,14 @@ pg = st.navigation(
 )
 
 # --- RUN NAVIGATION ---
-pg.run()
\ No newline at end of file
+pg.run()
+
+# --- SHARED DATASET CACHE STATS ---
+# Only shown once a deck has loaded data; importing dataset_cache here would
+# pull pandas into the landing page.
+if "dataset_cache" in sys.modules:
+    stats = sys.modules["dataset_cache"].cache.stats()
+    st.sidebar.caption(
+        f"Dataset cache: {stats['resident_mb']:.0f}/{stats['budget_mb']:.0f} MB, "
+        f"{stats['entries']} datasets, hit rate {stats['hit_rate']:.0%}"
+    )
@@ -0,0 +1,210 @@
+"""
+Embedded analytical queries over the historical trip data.
+
+The source CSVs are converted once into Parquet files under
+ESCOOTER_PARQUET_DIR (default data/parquet) and queried in-process with
+DuckDB. Filtered aggregations scan only the columns and row groups they
+need and hand back small result frames, so the full history never has to
+sit in pandas.
+
+- hex_hourly: hourly trips per hex (X_hex timestamps joined row by row to
+  the wide Y_hex targets, unpivoted, zero hours dropped)
+- od_flows: lime_maphex's origin-destination trip counts
+
+A Parquet file is rebuilt whenever its source CSV is newer. Hex IDs are
+uint64 H3 cells as everywhere else (see h3_index); pages decode them only
+for display. Every query runs on its own cursor, so sessions can query
+concurrently from Streamlit's threads.
+"""
+import os
+import threading
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+PARQUET_DIR = os.environ.get("ESCOOTER_PARQUET_DIR", "data/parquet")
+
+# H3 strings become UBIGINT through DuckDB's hex literal cast
+_HEX = "('0x' || trim({col}))::UBIGINT"
+
+TABLES = {
+    "hex_hourly": (
+        ["data/X_hex.csv", "data/Y_hex.csv"],
+        f"""
+        SELECT ts::TIMESTAMP AS ts, {_HEX.format(col="hex")} AS hex_id, trips::DOUBLE AS trips
+        FROM (
+            UNPIVOT (
+                SELECT x.ts, y.*
+                FROM (SELECT #1 AS ts FROM read_csv('data/X_hex.csv')) x
+                POSITIONAL JOIN read_csv('data/Y_hex.csv') y
+            )
+            ON COLUMNS(* EXCLUDE ts) INTO NAME hex VALUE trips
+        )
+        WHERE trips <> 0
+        ORDER BY ts
+        """,
+    ),
+    "od_flows": (
+        ["data/lime_maphex.csv"],
+        f"""
+        SELECT
+            {_HEX.format(col="start_hex")} AS start_hex,
+            {_HEX.format(col="end_hex")} AS end_hex,
+            tripcounts,
+            "Start Centroid Latitude",
+            "Start Centroid Longitude",
+            "End Centroid Latitude",
+            "End Centroid Longitude"
+        FROM read_csv('data/lime_maphex.csv')
+        """,
+    ),
+}
+
+
+# --- Parquet Files ---
+def _parquet_path(name):
+    return os.path.join(PARQUET_DIR, f"{name}.parquet")
+
+
+def _is_stale(name):
+    path = _parquet_path(name)
+    if not os.path.exists(path):
+        return True
+    sources, _ = TABLES[name]
+    return any(os.path.getmtime(src) > os.path.getmtime(path) for src in sources)
+
+
+def _build_parquet(con, name):
+    """Write one table's Parquet file aside, then rename, so readers never see a partial file."""
+    _, sql = TABLES[name]
+    path = _parquet_path(name)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(PARQUET_DIR, exist_ok=True)
+    con.execute(f"COPY ({sql}) TO '{tmp}' (FORMAT parquet, COMPRESSION zstd)")
+    os.replace(tmp, path)
+
+
+# --- Connection ---
+_con = None
+_con_lock = threading.Lock()
+
+
+def connect():
+    """Process-wide DuckDB connection with one view per Parquet table."""
+    global _con
+    with _con_lock:
+        if _con is None:
+            con = duckdb.connect()
+            for name in TABLES:
+                if _is_stale(name):
+                    _build_parquet(con, name)
+                con.execute(f"CREATE VIEW {name} AS SELECT * FROM read_parquet('{_parquet_path(name)}')")
+            _con = con
+        return _con
+
+
+def query(sql, params=None):
+    """Run `sql` on a fresh cursor and return the result as a DataFrame."""
+    cursor = connect().cursor()
+    try:
+        return cursor.execute(sql, params or {}).df()
+    finally:
+        cursor.close()
+
+
+def _where(start=None, end=None, hours=None, hex_ids=None):
+    """(WHERE clause, params) for the time-window, hour-of-day and hex filters."""
+    clauses, params = [], {}
+    if start is not None:
+        clauses.append("ts >= $start")
+        params["start"] = start
+    if end is not None:
+        clauses.append("ts < $end")
+        params["end"] = end
+    if hours is not None:
+        clauses.append("list_contains($hours, hour(ts))")
+        params["hours"] = [int(h) for h in hours]
+    if hex_ids is not None:
+        clauses.append("list_contains($hex_ids, hex_id)")
+        params["hex_ids"] = [int(h) for h in np.asarray(hex_ids, dtype=np.uint64)]
+    return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+# --- Hourly Hex Trips ---
+def time_range():
+    """(first, last) hour in hex_hourly."""
+    first, last = query("SELECT min(ts) AS first, max(ts) AS last FROM hex_hourly").iloc[0]
+    return first, last
+
+
+def window_days(start=None, end=None):
+    """
+    Every day of [start, end) within the history, as a DatetimeIndex. Zero
+    hours are not stored, so daily counts and means are taken over these
+    days rather than over the days that happen to have trips.
+    """
+    first, last = time_range()
+    lo = first if start is None else max(pd.Timestamp(start), first)
+    hi = last if end is None else min(pd.Timestamp(end) - pd.Timedelta(1, "ns"), last)
+    return pd.date_range(lo.normalize(), hi.normalize(), freq="D", name="day")
+
+
+def hourly_hex_ids():
+    """uint64 IDs of every hex with trips in hex_hourly."""
+    return query("SELECT DISTINCT hex_id FROM hex_hourly ORDER BY hex_id")["hex_id"].to_numpy(np.uint64)
+
+
+def hex_trips(start=None, end=None, hours=None, hex_ids=None):
+    """Trips per hex in [start, end), optionally for some hours of day and hexes: hex_id, trips."""
+    where, params = _where(start, end, hours, hex_ids)
+    return query(f"""
+        SELECT hex_id, sum(trips) AS trips
+        FROM hex_hourly {where}
+        GROUP BY hex_id
+        ORDER BY trips DESC
+    """, params)
+
+
+def daily_trips(start=None, end=None, hours=None, hex_ids=None):
+    """Total trips per day under the same filters, 0 for days without trips: day, trips."""
+    where, params = _where(start, end, hours, hex_ids)
+    df = query(f"""
+        SELECT date_trunc('day', ts) AS day, sum(trips) AS trips
+        FROM hex_hourly {where}
+        GROUP BY day
+    """, params)
+    return df.set_index("day")["trips"].reindex(window_days(start, end), fill_value=0.0).reset_index()
+
+
+def hourly_profile(start=None, end=None, hours=None, hex_ids=None):
+    """Mean trips per day of the window for each hour of day under the same filters: hour, trips."""
+    where, params = _where(start, end, hours, hex_ids)
+    df = query(f"""
+        SELECT hour(ts) AS hour, sum(trips) AS trips
+        FROM hex_hourly {where}
+        GROUP BY hour
+    """, params)
+    days = max(len(window_days(start, end)), 1)
+    profile = df.set_index("hour")["trips"].reindex(range(24) if hours is None else sorted(hours), fill_value=0.0)
+    return (profile / days).rename_axis("hour").reset_index()
+
+
+# --- Origin-Destination Flows ---
+def od_hex_ids():
+    """uint64 IDs of every hex that starts or ends an OD pair."""
+    return query("""
+        SELECT start_hex AS hex_id FROM od_flows
+        UNION
+        SELECT end_hex FROM od_flows
+        ORDER BY hex_id
+    """)["hex_id"].to_numpy(np.uint64)
+
+
+def od_flows(hex_ids=None, min_trips=0):
+    """OD pairs with at least `min_trips`, optionally only those starting or ending in `hex_ids`."""
+    clauses, params = ["tripcounts >= $min_trips"], {"min_trips": min_trips}
+    if hex_ids is not None:
+        clauses.append("(list_contains($hex_ids, start_hex) OR list_contains($hex_ids, end_hex))")
+        params["hex_ids"] = [int(h) for h in np.asarray(hex_ids, dtype=np.uint64)]
+    return query(f"SELECT * FROM od_flows WHERE {' AND '.join(clauses)}", params)
@@ -0,0 +1,132 @@
+"""
+Hourly weather inputs for forecasts and bulk scenarios.
+
+parse() reads a weather table from a CSV path, an uploaded file or pasted
+text and returns it in the models' terms: an hourly DatetimeIndex (ds)
+and whichever of WEATHER_COLUMNS the source provides, in the training
+units (deg C, %, m/s, mm/h).
+
+Column names are matched case-insensitively against ALIASES, which covers
+the training names, common spelled-out names and Meteostat's hourly
+export (time, temp, rhum, wspd in km/h, prcp). Meteostat's snow is snow
+depth rather than hourly snowfall and it has no cloud cover (only the
+coco condition code), so those columns are left out. Rows are
+averaged onto whole hours. Gaps of up to MAX_GAP_HOURS are interpolated
+for the continuous variables; missing precipitation counts as none.
+Timezone-aware timestamps are converted to Chicago local time, which is
+what the training data uses.
+"""
+import io
+import warnings
+
+import pandas as pd
+
+WEATHER_COLUMNS = ["temp", "humidity", "wind_speed", "rain_1h", "snow_1h", "clouds_all"]
+PRECIPITATION = ["rain_1h", "snow_1h"]
+TIMEZONE = "America/Chicago"
+MAX_GAP_HOURS = 6
+
+TIME_ALIASES = ["ds", "time", "timestamp", "datetime", "date_time", "date"]
+
+# source name -> (model column, factor to training units)
+ALIASES = {
+    "temp": ("temp", 1.0),
+    "temperature": ("temp", 1.0),
+    "temp_c": ("temp", 1.0),
+    "humidity": ("humidity", 1.0),
+    "rhum": ("humidity", 1.0),
+    "relative_humidity": ("humidity", 1.0),
+    "wind_speed": ("wind_speed", 1.0),
+    "wind": ("wind_speed", 1.0),
+    "wind_ms": ("wind_speed", 1.0),
+    "wspd": ("wind_speed", 1 / 3.6),
+    "wind_kmh": ("wind_speed", 1 / 3.6),
+    "rain_1h": ("rain_1h", 1.0),
+    "rain": ("rain_1h", 1.0),
+    "prcp": ("rain_1h", 1.0),
+    "precipitation": ("rain_1h", 1.0),
+    "snow_1h": ("snow_1h", 1.0),
+    "snowfall": ("snow_1h", 1.0),
+    "clouds_all": ("clouds_all", 1.0),
+    "clouds": ("clouds_all", 1.0),
+    "cloud_cover": ("clouds_all", 1.0),
+}
+
+VALID_RANGES = {
+    "temp": (-50.0, 55.0),
+    "humidity": (0.0, 100.0),
+    "wind_speed": (0.0, 60.0),
+    "rain_1h": (0.0, 200.0),
+    "snow_1h": (0.0, 100.0),
+    "clouds_all": (0.0, 100.0),
+}
+
+
+def _read(source):
+    if isinstance(source, str) and "\n" in source:
+        return pd.read_csv(io.StringIO(source), sep=None, engine="python")
+    return pd.read_csv(source, sep=None, engine="python")
+
+
+def parse(source):
+    """Hourly weather frame (index ds, WEATHER_COLUMNS present in the source); raises ValueError on bad input."""
+    raw = _read(source)
+    raw.columns = [str(col).strip().lower() for col in raw.columns]
+
+    time_col = next((col for col in TIME_ALIASES if col in raw.columns), None)
+    if time_col is None:
+        raise ValueError(f"No timestamp column; expected one of {', '.join(TIME_ALIASES)}")
+    ds = pd.to_datetime(raw[time_col], errors="coerce")
+    if ds.isna().any():
+        raise ValueError(f"{int(ds.isna().sum())} rows have an unreadable timestamp in '{time_col}'")
+    if ds.dt.tz is not None:
+        ds = ds.dt.tz_convert(TIMEZONE).dt.tz_localize(None)
+
+    weather = pd.DataFrame(index=pd.DatetimeIndex(ds.dt.floor("h"), name="ds"))
+    for col in raw.columns:
+        if col in ALIASES and ALIASES[col][0] not in weather.columns:
+            target, factor = ALIASES[col]
+            weather[target] = pd.to_numeric(raw[col], errors="coerce").to_numpy() * factor
+    if weather.columns.empty:
+        raise ValueError(f"No weather columns; expected some of {', '.join(WEATHER_COLUMNS)}")
+
+    problems = []
+    for col in weather.columns:
+        lo, hi = VALID_RANGES[col]
+        out_of_range = ((weather[col] < lo) | (weather[col] > hi)).sum()
+        if out_of_range:
+            problems.append(f"{col}: {out_of_range} values outside [{lo:g}, {hi:g}]")
+    if problems:
+        raise ValueError("Implausible weather values; " + "; ".join(problems))
+
+    weather = weather.groupby(level="ds").mean().resample("h").mean()
+    continuous = [col for col in weather.columns if col not in PRECIPITATION]
+    weather[continuous] = weather[continuous].interpolate(limit=MAX_GAP_HOURS, limit_area="inside")
+    precipitation = [col for col in weather.columns if col in PRECIPITATION]
+    weather[precipitation] = weather[precipitation].fillna(0.0)
+    return weather[[col for col in WEATHER_COLUMNS if col in weather.columns]]
+
+
+def climatology(history, columns=WEATHER_COLUMNS):
+    """Mean of each weather column by (month, hour of day) over a frame with an hourly DatetimeIndex."""
+    columns = [col for col in columns if col in history.columns]
+    return history[columns].groupby([history.index.month, history.index.hour]).mean()
+
+
+def fill_from_climatology(weather, history):
+    """Fill gaps in `weather` with the (month, hour) means of `history`."""
+    normals = climatology(history, weather.columns)
+    keys = pd.MultiIndex.from_arrays([weather.index.month, weather.index.hour])
+    fallback = normals.reindex(keys).set_axis(weather.index)
+    return weather.fillna(fallback)
+
+
+def read_optional(path):
+    """parse(path), or None (with a warning if it is unreadable) if the file is missing or invalid."""
+    try:
+        return parse(path)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        warnings.warn(f"Ignoring weather file {path}: {e}")
+        return None
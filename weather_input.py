@@ -0,0 +1,73 @@
+"""
+Streamlit input for hourly weather scenario files, and progressive display
+of their per-hex results, shared by the scenario decks.
+"""
+import pandas as pd
+import streamlit as st
+
+import h3_index
+import weather
+
+MAX_HOURS = 24 * 14
+
+EXAMPLE = """ds,temp,humidity,wind_speed,rain_1h,snow_1h,clouds_all
+2024-07-01 00:00,22.5,70,3.0,0.0,0.0,20
+2024-07-01 01:00,21.8,74,2.5,0.0,0.0,25
+"""
+
+
+def weather_file_input(key):
+    """Upload or paste an hourly weather CSV; returns the parsed frame, or None if nothing valid was given."""
+    uploaded = st.file_uploader("Weather CSV", type=["csv", "txt"], key=f"{key}_weather_file")
+    pasted = st.text_area(
+        "...or paste CSV rows", key=f"{key}_weather_text", height=120, placeholder=EXAMPLE
+    )
+    source = uploaded if uploaded is not None else (pasted if pasted.strip() else None)
+    if source is None:
+        return None
+
+    try:
+        weather_df = weather.parse(source if uploaded is not None else pasted.strip() + "\n")
+    except ValueError as exc:
+        st.error(f"Could not read the weather file: {exc}")
+        return None
+
+    if len(weather_df) > MAX_HOURS:
+        st.warning(f"Only the first {MAX_HOURS // 24} days ({MAX_HOURS} hours) are scored.")
+        weather_df = weather_df.iloc[:MAX_HOURS]
+    st.caption(
+        f"{len(weather_df)} hours from {weather_df.index[0]:%Y-%m-%d %H:%M} to "
+        f"{weather_df.index[-1]:%Y-%m-%d %H:%M}; columns: {', '.join(weather_df.columns)}"
+    )
+    return weather_df
+
+
+def show_hex_stream(chunks, value_name, n_chunks, rank_by_abs=False):
+    """
+    Render per-hex chunks (see scenarios.stream_hex_weather_predictions) as
+    they arrive: a progress bar, the city-wide hourly total and the top hexes
+    so far. Returns all chunks as one frame with H3 string IDs.
+    """
+    progress = st.progress(0.0, text="Scoring weather file...")
+    hourly_chart = st.empty()
+    top_table = st.empty()
+
+    parts, hourly, totals = [], [], None
+    for n, chunk in enumerate(chunks, start=1):
+        parts.append(chunk)
+        hourly.append(chunk.groupby("ds")[value_name].sum())
+        chunk_totals = chunk.groupby("hex_id")[value_name].sum()
+        totals = chunk_totals if totals is None else totals.add(chunk_totals, fill_value=0)
+
+        hourly_chart.line_chart(pd.concat(hourly), y_label=f"Total {value_name}")
+        ranked = totals.abs().sort_values(ascending=False) if rank_by_abs else totals.sort_values(ascending=False)
+        top = totals.loc[ranked.index[:20]]
+        top_table.dataframe(
+            pd.DataFrame({"hex_id": h3_index.decode(top.index), f"total_{value_name}": top.to_numpy()}),
+            hide_index=True,
+        )
+        progress.progress(n / n_chunks, text=f"Scored {n} of {n_chunks} days")
+
+    result = pd.concat(parts, ignore_index=True)
+    result["hex_id"] = h3_index.decode(result["hex_id"])
+    return result